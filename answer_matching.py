@@ -0,0 +1,82 @@
+from functools import lru_cache
+from typing import List, Dict, Set, Tuple, Iterable
+from collections import defaultdict
+from text_normalizer import normalize_key, ANSWER_PREFIX_PATTERN
+
+# Answers longer than this may match an option by substring
+SUBSTRING_MATCH_MIN_LENGTH = 15
+
+# Answers with more words than this may match an option containing all of them
+WORD_MATCH_MIN_WORDS = 2
+
+class AnswerIndex:
+    def __init__(self, option_texts: Iterable[str]):
+        """Precompute the normalized forms of a question's options for answer matching
+
+        Holds each option's normalized key, its core (key without an 'a.'-style
+        label) and an inverted index from core words to options, so matching a
+        feedback answer needs dictionary lookups instead of re-cleaning and
+        re-splitting every option for every answer.
+        """
+        self.keys = [normalize_key(text) for text in option_texts]
+        self.cores = [ANSWER_PREFIX_PATTERN.sub('', key) for key in self.keys]
+        self._by_key = defaultdict(list)
+        self._by_core = defaultdict(list)
+        self._by_word = defaultdict(set)
+        for idx, (key, core) in enumerate(zip(self.keys, self.cores)):
+            self._by_key[key].append(idx)
+            self._by_core[core].append(idx)
+            for word in set(core.split()):
+                self._by_word[word].add(idx)
+
+    def match(self, answer: str) -> Set[int]:
+        """Return the indices of the options a feedback answer matches
+
+        Same rules as the extractor always used: exact key or core equality,
+        substring containment for long answers, and every answer word present
+        in the option for answers of three or more words.
+        """
+        answer_key = normalize_key(answer)
+        answer_core = ANSWER_PREFIX_PATTERN.sub('', answer_key)
+
+        matched = set(self._by_key.get(answer_key, ()))
+        matched.update(self._by_core.get(answer_core, ()))
+
+        # Partial match for longer answers (but be more conservative)
+        if len(answer_key) > SUBSTRING_MATCH_MIN_LENGTH:
+            for idx, key in enumerate(self.keys):
+                if idx not in matched and (answer_key in key or key in answer_key):
+                    matched.add(idx)
+
+        # Check if all words in the answer are in the option
+        answer_words = set(answer_core.split())
+        if len(answer_words) > WORD_MATCH_MIN_WORDS:
+            postings = [self._by_word.get(word) for word in answer_words]
+            if all(postings):
+                matched.update(set.intersection(*postings))
+
+        return matched
+
+    def match_all(self, answers: Iterable[str]) -> Set[int]:
+        """Return the indices of the options matched by any of the answers"""
+        matched = set()
+        for answer in answers:
+            matched |= self.match(answer)
+        return matched
+
+    def unmatched_answers(self, answers: Iterable[str]) -> List[str]:
+        """Return the answers that match none of the options"""
+        return [answer for answer in answers if not self.match(answer)]
+
+@lru_cache(maxsize=4096)
+def get_answer_index(option_texts: Tuple[str, ...]) -> AnswerIndex:
+    """Return the (memoized) index for a tuple of option texts
+
+    Extraction and validation both go through here, so a question's index is
+    built once per process and both phases apply identical matching rules.
+    """
+    return AnswerIndex(option_texts)
+
+def question_answer_index(question: Dict) -> AnswerIndex:
+    """Return the answer index for an extracted question dict"""
+    return get_answer_index(tuple(opt['text'] for opt in question.get('options', [])))
@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+from functools import partial
+from typing import List, Dict, Any, Optional, Tuple
+from question_index import question_id
+from sharded_output import write_atomic
+from quiz_extractor import QuizExtractor, PARSER_BACKENDS
+from quiz_ingest import expand_sources, map_pages, PrefetchReader, DEFAULT_IO_THREADS, DEFAULT_PREFETCH
+
+# Version of the counters file layout written by AnswerStats.save
+ANSWER_STATS_VERSION = 2
+
+ANSWER_STATS_FILE = 'answer_stats.json'
+
+# Seconds between saves of the counters while counting
+DEFAULT_SAVE_INTERVAL = 30.0
+
+# Response outcomes from QuizExtractor.iter_responses; 'ungraded' counts responses without one (e.g. essays)
+OUTCOMES = ('correct', 'partial', 'incorrect', 'unanswered', 'ungraded')
+
+def page_responses(name: str, content: str, parser: str = 'lxml',
+                   stream: bool = False) -> Tuple[str, List[Tuple[Dict[str, Any], Dict[str, Any]]]]:
+    """Worker entry point: the content digest of one attempt page and its (question, response) pairs"""
+    digest = hashlib.sha1(content.encode('utf-8')).hexdigest()
+    return digest, list(QuizExtractor(name, parser, stream=stream, content=content).iter_responses())
+
+class AnswerStats:
+    def __init__(self, stats_file: str):
+        """Answer counters per question ID, accumulated over attempt pages and kept between runs
+
+        Each question counts its attempts, how many ended in each outcome,
+        and per option how often it was chosen and how often it was chosen and
+        marked correct. Options are keyed by text, since attempts shuffle
+        their order. pages maps every counted page to its fingerprint, so an
+        unchanged page is skipped without being read; digests holds the
+        content hash of every counted page, so the same attempt reached under
+        another name (a copy, a second export) is not counted twice.
+        """
+        self.stats_file = stats_file
+        self.questions = {}
+        self.pages = {}
+        self.digests = set()
+        self._dirty = False
+
+    def load(self) -> 'AnswerStats':
+        """Load counters from disk, starting empty if the file is missing, unreadable or of another version"""
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return self
+        if data.get('version') == ANSWER_STATS_VERSION:
+            self.questions = data.get('questions', {})
+            self.pages = data.get('pages', {})
+            self.digests = set(data.get('digests', []))
+        return self
+
+    def save(self):
+        """Atomically write counters and processed pages together if anything changed
+
+        Pages are only marked processed in the same write as their counts, so
+        an interrupted run recounts nothing and loses at most the pages since
+        the last save, which the next run picks up again.
+        """
+        if not self._dirty:
+            return
+        write_atomic(self.stats_file, json.dumps({
+            'version': ANSWER_STATS_VERSION,
+            'questions': self.questions,
+            'pages': self.pages,
+            'digests': sorted(self.digests)
+        }, ensure_ascii=False).encode('utf-8'))
+        self._dirty = False
+
+    def is_processed(self, key: str, fingerprint: str) -> bool:
+        return self.pages.get(key) == fingerprint
+
+    def add_page(self, key: str, fingerprint: str, digest: str,
+                 responses: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> bool:
+        """Count one attempt page's responses; returns False when the same content was already counted"""
+        self.pages[key] = fingerprint
+        self._dirty = True
+        if digest in self.digests:
+            return False
+        self.digests.add(digest)
+        for question, response in responses:
+            self.add_response(question, response)
+        return True
+
+    def add_response(self, question: Dict[str, Any], response: Dict[str, Any]):
+        entry = self.questions.setdefault(question_id(question), {
+            'question': question['question'],
+            'type': question['type'],
+            'attempts': 0,
+            'outcomes': {outcome: 0 for outcome in OUTCOMES},
+            'options': {}
+        })
+        entry['attempts'] += 1
+        entry['outcomes'][response['outcome'] or 'ungraded'] += 1
+        options = entry['options']
+        for option in question['options']:
+            options.setdefault(option['text'], {'chosen': 0, 'correct': 0})
+        correct = {option['text'] for option in question['options'] if option['isCorrect']}
+        for text, mark in zip(response['chosen'], response['marks']):
+            counts = options.setdefault(text, {'chosen': 0, 'correct': 0})
+            counts['chosen'] += 1
+            # Without a mark on the page, fall back to the extracted answer key
+            is_correct = mark if mark is not None else text in correct
+            if is_correct:
+                counts['correct'] += 1
+        self._dirty = True
+
+    @staticmethod
+    def difficulty(entry: Dict[str, Any]) -> Optional[float]:
+        """Share of graded attempts answered correctly (partial credit counts half), or None"""
+        outcomes = entry['outcomes']
+        graded = entry['attempts'] - outcomes['ungraded']
+        if not graded:
+            return None
+        return (outcomes['correct'] + 0.5 * outcomes['partial']) / graded
+
+    def hardest(self, limit: int = 10, min_attempts: int = 1) -> List[Tuple[str, Dict[str, Any], float]]:
+        """Return (question ID, counters, difficulty) of the least often correctly answered questions"""
+        rated = [(qid, entry, self.difficulty(entry)) for qid, entry in self.questions.items()
+                 if entry['attempts'] >= min_attempts]
+        rated = [item for item in rated if item[2] is not None]
+        return sorted(rated, key=lambda item: (item[2], -item[1]['attempts']))[:limit]
+
+    def print_summary(self, limit: int = 10, min_attempts: int = 1):
+        attempts = sum(entry['attempts'] for entry in self.questions.values())
+        print(f"\n📊 {attempts} answers to {len(self.questions)} questions from {len(self.digests)} attempt pages")
+        hardest = self.hardest(limit, min_attempts)
+        if hardest:
+            print(f"🧗 Hardest questions (share answered correctly, at least {min_attempts} attempts):")
+        for qid, entry, difficulty in hardest:
+            print(f"   {qid}  {difficulty:5.0%} of {entry['attempts']:>5}  {entry['question'][:70]}")
+            wrong = [(counts['chosen'] - counts['correct'], text) for text, counts in entry['options'].items()]
+            misses, text = max(wrong, default=(0, ''))
+            if misses:
+                print(f"{'':20}most chosen wrongly: '{text[:50]}' ({misses}x)")
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Count how often each question and option is answered correctly over attempt pages')
+    parser.add_argument('sources', nargs='*',
+                        help="archives, folders, HTML files or glob patterns (none: only print the saved statistics)")
+    parser.add_argument('--stats', default=ANSWER_STATS_FILE, help=f'counters file to update (default: {ANSWER_STATS_FILE})')
+    parser.add_argument('--workers', type=int, default=1, help='parse pages in N processes (0 = one per CPU, default: 1)')
+    parser.add_argument('--io-threads', type=int, default=DEFAULT_IO_THREADS,
+                        help=f'threads reading sources ahead of the parser (default: {DEFAULT_IO_THREADS})')
+    parser.add_argument('--prefetch', type=int, default=DEFAULT_PREFETCH, help=f'pages read ahead at most (default: {DEFAULT_PREFETCH})')
+    parser.add_argument('--parser', choices=PARSER_BACKENDS, default='lxml', help='HTML parser backend (default: lxml)')
+    parser.add_argument('--stream', action='store_true', help='read each page incrementally, one question container at a time')
+    parser.add_argument('--save-interval', type=float, default=DEFAULT_SAVE_INTERVAL,
+                        help=f'seconds between saves of the counters while counting (default: {DEFAULT_SAVE_INTERVAL:g})')
+    parser.add_argument('--top', type=int, default=10, help='hardest questions to list (default: 10)')
+    parser.add_argument('--min-attempts', type=int, default=5, help='attempts a question needs to be listed (default: 5)')
+    args = parser.parse_args(argv)
+
+    stats = AnswerStats(args.stats).load()
+    if args.sources:
+        workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+        reader = PrefetchReader(expand_sources(args.sources), args.io_threads, args.prefetch, stats.is_processed)
+        work = partial(page_responses, parser=args.parser, stream=args.stream)
+        counted = skipped = duplicates = failed = 0
+        start = last_save = time.perf_counter()
+        try:
+            for page, result, error in map_pages(reader, work, workers):
+                if error is not None:
+                    failed += 1
+                    print(f"    ❌ Error processing {page.key}: {error}")
+                elif result is None:
+                    skipped += 1
+                elif stats.add_page(page.key, page.fingerprint, *result):
+                    counted += 1
+                else:
+                    duplicates += 1
+                if time.perf_counter() - last_save >= args.save_interval:
+                    stats.save()
+                    last_save = time.perf_counter()
+        finally:
+            reader.close()
+            stats.save()
+        elapsed = time.perf_counter() - start
+        print(f"📥 Counted {counted} new attempt pages in {elapsed:.1f}s; {skipped} already counted, "
+              f"{duplicates} duplicates, {failed} failed")
+        print(f"📄 Statistics saved to: {args.stats}")
+    stats.print_summary(args.top, args.min_attempts)
+
+if __name__ == '__main__':
+    main()
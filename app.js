@@ -2,6 +2,10 @@
 class QuizApp {
     constructor() {
         this.quizData = null;
+        this.questionsById = {};
+        this.manifest = null; // Set when the sharded database (quiz_db/manifest.json) is available
+        this.shardBaseUrl = 'quiz_db';
+        this.samplingApi = null; // Quiz list from quiz_server.py when it serves the app, false otherwise
         this.currentQuiz = null;
         this.currentQuestions = [];
         this.currentQuestionIndex = 0;
@@ -24,6 +28,13 @@ class QuizApp {
         this.studyQuestionIndex = 0;
         this.studyQuizName = null;
         
+        // Study search: search_index.json decoded on first use when quiz_server.py is not serving the app
+        this.searchIndex = null;
+        this.searchTerms = null;
+        this.searchImpacts = new Map();
+        this.searchTimer = null;
+        this.searchQuery = '';
+        
         this.init();
     }
 
@@ -36,8 +47,13 @@ class QuizApp {
     async loadQuizData() {
         try {
             this.showLoading();
+            // Prefer the sharded database: only the small manifest is fetched up front
+            if (await this.loadManifest()) {
+                console.log('Quiz manifest loaded successfully:', this.getQuizNames().length, 'quizzes');
+                return;
+            }
             const response = await fetch('quiz_database.json');
-            this.quizData = await response.json();
+            this.quizData = this.expandQuizDatabase(await response.json());
             console.log('Quiz data loaded successfully:', Object.keys(this.quizData).length, 'quizzes');
         } catch (error) {
             console.error('Error loading quiz data:', error);
@@ -45,6 +61,106 @@ class QuizApp {
         }
     }
 
+    async loadManifest() {
+        try {
+            const response = await fetch(`${this.shardBaseUrl}/manifest.json`);
+            if (!response.ok) {
+                return false;
+            }
+            this.manifest = await response.json();
+            this.quizData = {}; // Filled per quiz by ensureQuizzesLoaded
+            return true;
+        } catch (error) {
+            return false;
+        }
+    }
+
+    async ensureQuizzesLoaded(quizNames) {
+        if (!this.manifest) {
+            return; // Full database already in memory
+        }
+        
+        const missing = quizNames.filter(quizName => !this.quizData[quizName] && this.manifest.quizzes[quizName]);
+        if (missing.length === 0) {
+            return;
+        }
+        
+        this.showLoading();
+        try {
+            await Promise.all(missing.map(async quizName => {
+                const response = await fetch(`${this.shardBaseUrl}/${this.manifest.quizzes[quizName].file}`);
+                const shard = await response.json();
+                
+                // Questions shared between quizzes keep a single object
+                Object.entries(shard.questions).forEach(([id, question]) => {
+                    if (!this.questionsById[id]) {
+                        question.id = id;
+                        this.questionsById[id] = question;
+                    }
+                });
+                this.quizData[quizName] = shard.ids.map(id => this.questionsById[id]);
+            }));
+        } catch (error) {
+            console.error('Error loading quiz shards:', error);
+            this.showMessage('Lỗi tải dữ liệu', 'Không thể tải dữ liệu quiz. Vui lòng thử lại', 'error');
+        } finally {
+            this.hideLoading();
+        }
+    }
+
+    async detectSamplingApi() {
+        if (this.samplingApi === null) {
+            try {
+                const response = await fetch('api/quizzes');
+                this.samplingApi = response.ok ? await response.json() : false;
+            } catch (error) {
+                this.samplingApi = false;
+            }
+        }
+        return this.samplingApi;
+    }
+
+    async fetchRandomSample(count) {
+        // The server draws a type-stratified sample, so only the chosen questions are downloaded
+        try {
+            const response = await fetch(`api/sample?count=${count}`);
+            if (!response.ok) {
+                return null;
+            }
+            const sample = await response.json();
+            return sample.ids.map(id => this.rememberQuestion(id, sample.questions[id]));
+        } catch (error) {
+            console.error('Error fetching random sample:', error);
+            return null;
+        }
+    }
+
+    getQuizNames() {
+        return this.manifest ? Object.keys(this.manifest.quizzes) : Object.keys(this.quizData);
+    }
+
+    getQuizQuestionCount(quizName) {
+        return this.manifest ? this.manifest.quizzes[quizName].count : this.quizData[quizName].length;
+    }
+
+    expandQuizDatabase(data) {
+        // Indexed format: every question is stored once and quizzes list question IDs
+        if (!data.questions || !data.quizzes) {
+            return data; // Legacy format: full question list per quiz
+        }
+        
+        this.questionsById = data.questions;
+        Object.entries(this.questionsById).forEach(([id, question]) => {
+            question.id = id;
+        });
+        
+        const quizData = {};
+        Object.entries(data.quizzes).forEach(([quizName, ids]) => {
+            quizData[quizName] = ids.map(id => this.questionsById[id]);
+        });
+        return quizData;
+    }
+
     setupEventListeners() {
         // Keyboard shortcuts
         document.addEventListener('keydown', (e) => {
@@ -61,6 +177,15 @@ class QuizApp {
             }
         });
 
+        // Search questions across all quizzes from the study selection screen
+        const studySearchInput = document.getElementById('studySearchInput');
+        if (studySearchInput) {
+            studySearchInput.addEventListener('input', () => {
+                clearTimeout(this.searchTimer);
+                this.searchTimer = setTimeout(() => this.searchStudyQuestions(studySearchInput.value), 200);
+            });
+        }
+
         // Update question count input
         const questionCountInput = document.getElementById('questionCount');
         if (questionCountInput) {
@@ -168,9 +293,8 @@ class QuizApp {
         const quizList = document.getElementById('quizList');
         quizList.innerHTML = '';
 
-        Object.keys(this.quizData).forEach(quizName => {
-            const quiz = this.quizData[quizName];
-            const questionCount = quiz.length;
+        this.getQuizNames().forEach(quizName => {
+            const questionCount = this.getQuizQuestionCount(quizName);
             
             const quizItem = document.createElement('div');
             quizItem.className = 'quiz-item selectable';
@@ -210,7 +334,7 @@ class QuizApp {
     }
 
     selectAllQuizzes() {
-        this.selectedQuizNames = Object.keys(this.quizData);
+        this.selectedQuizNames = this.getQuizNames();
         this.updateQuizCheckboxes();
         this.updateSelectedQuizInfo();
     }
@@ -264,9 +388,8 @@ class QuizApp {
         const studyQuizList = document.getElementById('studyQuizList');
         studyQuizList.innerHTML = '';
 
-        Object.keys(this.quizData).forEach(quizName => {
-            const quiz = this.quizData[quizName];
-            const questionCount = quiz.length;
+        this.getQuizNames().forEach(quizName => {
+            const questionCount = this.getQuizQuestionCount(quizName);
             
             const quizItem = document.createElement('div');
             quizItem.className = 'quiz-item';
@@ -285,18 +408,220 @@ class QuizApp {
         });
     }
 
-    startStudyMode(quizName) {
+    async startStudyMode(quizName) {
+        await this.ensureQuizzesLoaded([quizName]);
+        if (!this.quizData[quizName]) {
+            return;
+        }
+        
+        this.openStudy(quizName, [...this.quizData[quizName]], 0);
+    }
+
+    openStudy(title, questions, startIndex) {
         this.studyMode = true;
-        this.studyQuizName = quizName;
-        this.studyQuestions = [...this.quizData[quizName]];
-        this.studyQuestionIndex = 0;
+        this.studyQuizName = title;
+        this.studyQuestions = questions;
+        this.studyQuestionIndex = startIndex;
         
         this.showScreen('studyScreen');
         this.displayStudyQuestion();
         this.updateStudyProgress();
     }
 
-    showSettings() {
+    foldSearchText(text) {
+        // Same folding as text_normalizer.fold_text: lowercase, no diacritics, punctuation as spaces
+        return text.toLowerCase().replace(/đ/g, 'd').normalize('NFD').replace(/\p{M}/gu, '')
+            .replace(/[^\p{L}\p{N}]+/gu, ' ').trim();
+    }
+
+    async searchStudyQuestions(query) {
+        const resultsList = document.getElementById('studySearchResults');
+        const quizList = document.getElementById('studyQuizList');
+        this.searchQuery = query;
+        if (!this.foldSearchText(query)) {
+            resultsList.style.display = 'none';
+            quizList.style.display = '';
+            return;
+        }
+        
+        const results = await this.findQuestions(query, 50);
+        if (query !== this.searchQuery) {
+            return; // A newer query is already being answered
+        }
+        resultsList.style.display = '';
+        quizList.style.display = 'none';
+        this.renderSearchResults(query, results);
+    }
+
+    async findQuestions(query, limit) {
+        // Served by quiz_server.py: the server searches and returns only the matching questions
+        if (await this.detectSamplingApi()) {
+            try {
+                const response = await fetch(`api/search?q=${encodeURIComponent(query)}&limit=${limit}`);
+                if (response.ok) {
+                    const page = await response.json();
+                    return {total: page.total, questions: page.ids.map(id => this.rememberQuestion(id, page.questions[id]))};
+                }
+            } catch (error) {
+                console.error('Error searching questions:', error);
+            }
+        }
+        
+        if (!await this.loadSearchIndex()) {
+            return null;
+        }
+        const {total, docs} = this.searchLocal(query, limit);
+        const quizNames = [...new Set(docs.map(doc => this.searchIndex.quizzes[this.searchIndex.quiz[doc]]))];
+        await this.ensureQuizzesLoaded(quizNames);
+        const questions = docs.map(doc => this.questionsById[this.searchIndex.ids[doc]]).filter(Boolean);
+        return {total, questions};
+    }
+
+    rememberQuestion(id, question) {
+        if (!this.questionsById[id]) {
+            question.id = id;
+            this.questionsById[id] = question;
+        }
+        return this.questionsById[id];
+    }
+
+    async loadSearchIndex() {
+        if (this.searchIndex === null) {
+            try {
+                const url = this.manifest ? `${this.shardBaseUrl}/search_index.json` : 'search_index.json';
+                const response = await fetch(url);
+                this.searchIndex = response.ok ? await response.json() : false;
+            } catch (error) {
+                this.searchIndex = false;
+            }
+            if (this.searchIndex) {
+                const lengths = this.searchIndex.lengths;
+                const averageLength = (lengths.reduce((sum, length) => sum + length, 0) / (lengths.length || 1)) || 1;
+                this.searchNorms = lengths.map(length => 1.2 * (0.25 + 0.75 * length / averageLength));
+                this.searchTerms = Object.keys(this.searchIndex.terms).sort();
+            }
+        }
+        return this.searchIndex;
+    }
+
+    searchImpactsOf(term) {
+        // Decode the gap-encoded postings of a term into [doc, BM25 impact] pairs once
+        if (!this.searchImpacts.has(term)) {
+            const flat = this.searchIndex.terms[term];
+            const df = flat.length / 2;
+            const idf = Math.log(1 + (this.searchIndex.ids.length - df + 0.5) / (df + 0.5));
+            const impacts = new Map();
+            let doc = 0;
+            for (let i = 0; i < flat.length; i += 2) {
+                doc += flat[i];
+                const tf = flat[i + 1];
+                impacts.set(doc, idf * tf * 2.2 / (tf + this.searchNorms[doc]));
+            }
+            this.searchImpacts.set(term, impacts);
+        }
+        return this.searchImpacts.get(term);
+    }
+
+    expandSearchPrefix(prefix) {
+        if (prefix.length < 2) {
+            return Object.hasOwn(this.searchIndex.terms, prefix) ? [prefix] : [];
+        }
+        let low = 0;
+        let high = this.searchTerms.length;
+        while (low < high) {
+            const mid = (low + high) >> 1;
+            if (this.searchTerms[mid] < prefix) {
+                low = mid + 1;
+            } else {
+                high = mid;
+            }
+        }
+        const terms = [];
+        while (low < this.searchTerms.length && terms.length < 64 && this.searchTerms[low].startsWith(prefix)) {
+            terms.push(this.searchTerms[low++]);
+        }
+        return terms;
+    }
+
+    searchLocal(query, limit) {
+        // Mirrors SearchIndex.match: every token must match, the last one may be a prefix
+        const tokens = [...new Set(this.foldSearchText(query).split(' ').filter(Boolean))];
+        const alternatives = tokens.map((token, i) => i === tokens.length - 1
+            ? this.expandSearchPrefix(token)
+            : (Object.hasOwn(this.searchIndex.terms, token) ? [token] : []));
+        if (alternatives.length === 0 || alternatives.some(terms => terms.length === 0)) {
+            return {total: 0, docs: []};
+        }
+        
+        const postingCount = terms => terms.reduce((sum, term) => sum + this.searchIndex.terms[term].length, 0);
+        alternatives.sort((a, b) => postingCount(a) - postingCount(b));
+        let scores = null;
+        for (const terms of alternatives) {
+            const tokenScores = new Map();
+            terms.forEach(term => {
+                this.searchImpactsOf(term).forEach((impact, doc) => {
+                    if ((!scores || scores.has(doc)) && impact > (tokenScores.get(doc) || 0)) {
+                        tokenScores.set(doc, impact);
+                    }
+                });
+            });
+            if (scores) {
+                tokenScores.forEach((impact, doc) => tokenScores.set(doc, impact + scores.get(doc)));
+            }
+            scores = tokenScores;
+            if (scores.size === 0) {
+                break;
+            }
+        }
+        
+        const ranked = [...scores].sort((a, b) => b[1] - a[1] || a[0] - b[0]).slice(0, limit);
+        return {total: scores.size, docs: ranked.map(([doc]) => doc)};
+    }
+
+    renderSearchResults(query, results) {
+        const resultsList = document.getElementById('studySearchResults');
+        resultsList.innerHTML = '';
+        
+        const summary = document.createElement('div');
+        summary.className = 'search-summary';
+        if (!results) {
+            summary.textContent = 'Tìm kiếm chưa khả dụng: hãy tạo lại dữ liệu với quiz_extractor.py (định dạng indexed hoặc sharded)';
+        } else if (results.total === 0) {
+            summary.textContent = `Không tìm thấy câu hỏi nào cho "${query}"`;
+        } else {
+            const shown = results.questions.length < results.total ? ` (hiển thị ${results.questions.length})` : '';
+            summary.textContent = `${results.total} câu hỏi khớp "${query}"${shown}`;
+        }
+        resultsList.appendChild(summary);
+        if (!results) {
+            return;
+        }
+        
+        results.questions.forEach((question, index) => {
+            const resultItem = document.createElement('div');
+            resultItem.className = 'quiz-item';
+            resultItem.onclick = () => this.openStudy(`Tìm kiếm: ${query}`, results.questions, index);
+            
+            const title = document.createElement('h3');
+            title.textContent = question.question;
+            const answers = document.createElement('p');
+            answers.textContent = (question.correctAnswers || []).join(' • ') || 'Không có thông tin đáp án';
+            resultItem.append(title, answers);
+            
+            resultsList.appendChild(resultItem);
+        });
+    }
+
+    async showSettings() {
+        // Only the shards of the quizzes taking part are downloaded; random quizzes
+        // served by quiz_server.py are sampled server-side and need none
+        if (this.quizMode === 'random') {
+            if (!await this.detectSamplingApi()) {
+                await this.ensureQuizzesLoaded(this.getQuizNames());
+            }
+        } else {
+            await this.ensureQuizzesLoaded(this.selectedQuizNames);
+        }
         this.showScreen('settingsScreen');
         this.updateSettingsUI();
     }
@@ -337,10 +662,15 @@ class QuizApp {
             });
             return this.removeDuplicateQuestions(allQuestions).length;
         } else if (this.quizMode === 'random') {
+            if (this.samplingApi) {
+                return this.samplingApi.validQuestionCount;
+            }
             // Count all unique questions across all quizzes
             const allQuestions = [];
-            Object.values(this.quizData).forEach(quiz => {
-                allQuestions.push(...quiz);
+            this.getQuizNames().forEach(quizName => {
+                if (this.quizData[quizName]) {
+                    allQuestions.push(...this.quizData[quizName]);
+                }
             });
             return this.removeDuplicateQuestions(allQuestions).length;
         }
@@ -363,9 +693,9 @@ class QuizApp {
         event.target.classList.add('active');
     }
 
-    startQuiz() {
+    async startQuiz() {
         this.updateSettingsFromUI();
-        this.prepareQuestions();
+        await this.prepareQuestions();
         this.currentQuestionIndex = 0;
         this.userAnswers = [];
         this.startTime = new Date();
@@ -392,8 +722,17 @@ class QuizApp {
         this.settings.shuffleAnswers = document.getElementById('shuffleAnswers').checked;
     }
 
-    prepareQuestions() {
+    async prepareQuestions() {
         let questions = [];
+        let sampled = null;
+        if (this.quizMode === 'random' && this.samplingApi) {
+            sampled = await this.fetchRandomSample(this.settings.questionCount);
+            if (!sampled) {
+                // Server sampling failed: fall back to shuffling the full question bank here
+                this.samplingApi = false;
+                await this.ensureQuizzesLoaded(this.getQuizNames());
+            }
+        }
         
         if (this.quizMode === 'specific') {
             // Collect questions from selected quizzes
@@ -404,10 +743,14 @@ class QuizApp {
             });
             // Remove duplicates
             questions = this.removeDuplicateQuestions(questions);
+        } else if (sampled) {
+            questions = sampled;
         } else if (this.quizMode === 'random') {
             // Collect all questions from all quizzes
-            Object.values(this.quizData).forEach(quiz => {
-                questions.push(...quiz);
+            this.getQuizNames().forEach(quizName => {
+                if (this.quizData[quizName]) {
+                    questions.push(...this.quizData[quizName]);
+                }
             });
             // Remove duplicates
             questions = this.removeDuplicateQuestions(questions);
@@ -440,7 +783,7 @@ class QuizApp {
     removeDuplicateQuestions(questions) {
         const seen = new Set();
         return questions.filter(question => {
-            const key = question.question.toLowerCase().trim();
+            const key = question.id || question.question.toLowerCase().trim();
             if (seen.has(key)) {
                 return false;
             }
@@ -0,0 +1,131 @@
+"""Extraction throughput benchmark across parser backends and worker counts.
+
+Usage: python benchmarks/bench_extraction.py [--corpus DIR] [--parsers lxml html.parser] [--workers 1 4]
+
+Without --corpus a synthetic corpus is generated (see synthetic_pages.py), so
+the benchmark runs fully offline. Every (parser, workers) configuration runs in
+a fresh interpreter so peak RSS, taken over the process and its pool workers,
+belongs to that configuration alone. Per-phase timings come from the
+extractor's own ExtractionMetrics; with several workers they are summed over
+all worker processes (CPU time rather than wall time).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+import contextlib
+from typing import List, Dict, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz_extractor import PARSER_BACKENDS, extract_files, find_quiz_dirs, list_html_files, remove_duplicate_questions
+from question_validation import validate_database
+from instrumentation import ExtractionMetrics, PHASES
+from synthetic_pages import generate_corpus, parse_mix, DEFAULT_MIX
+
+PHASE_LABELS = {'type_detection': 'type', 'validation': 'validate'}
+
+def corpus_files(corpus_dir: str) -> Dict[str, List[str]]:
+    """Return the HTML files of every Quiz directory in the corpus"""
+    files = {}
+    for quiz_dir in find_quiz_dirs(corpus_dir) or sorted(os.listdir(corpus_dir)):
+        quiz_path = os.path.join(corpus_dir, quiz_dir)
+        if os.path.isdir(quiz_path):
+            files[quiz_dir] = [os.path.join(quiz_path, f) for f in sorted(list_html_files(quiz_path))]
+    return files
+
+def run_config(parser: str, workers: int, corpus_dir: str) -> Dict[str, Any]:
+    """Measure one configuration inside the current (fresh) process"""
+    quiz_files = corpus_files(corpus_dir)
+    all_files = [f for files in quiz_files.values() for f in files]
+
+    metrics = ExtractionMetrics()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        results = extract_files(all_files, workers, parser, metrics=metrics)
+        wall = time.perf_counter() - start
+        # Dedup and validation run in the parent once extraction is done, as in build_quiz_database
+        # and publish_database
+        offset = 0
+        all_quiz_data = {}
+        for quiz_dir, files in quiz_files.items():
+            questions = [q for qs, _ in results[offset:offset + len(files)] if qs for q in qs]
+            offset += len(files)
+            with metrics.phase('dedup'):
+                all_quiz_data[quiz_dir] = remove_duplicate_questions(questions)
+        with metrics.phase('validation'):
+            validate_database(all_quiz_data)
+
+    rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+              resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return {
+        'parser': parser,
+        'workers': workers,
+        'files': len(all_files),
+        'questions': sum(len(questions) for questions, error in results if questions),
+        'errors': sum(1 for _, error in results if error is not None),
+        'wall': wall,
+        'phases': {phase: metrics.seconds[phase] for phase in PHASES},
+        'max_rss_kb': rss
+    }
+
+def run_config_isolated(parser: str, workers: int, corpus_dir: str) -> Dict[str, Any]:
+    """Run one configuration in a fresh interpreter and return its measurements"""
+    with tempfile.NamedTemporaryFile('r', suffix='.json') as result_file:
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--corpus', corpus_dir,
+                        '--run-config', parser, str(workers), result_file.name],
+                       check=True, stdout=subprocess.DEVNULL)
+        return json.load(result_file)
+
+def print_report(results: List[Dict[str, Any]]):
+    print(f"{'parser':<13}{'workers':>8}{'files/s':>10}{'q/s':>10}"
+          + ''.join(f"{PHASE_LABELS.get(phase, phase) + ' s':>12}" for phase in PHASES) + f"{'peak RSS MB':>13}")
+    for r in results:
+        phase_cols = ''.join(f"{r['phases'][p]:>12.3f}" for p in PHASES)
+        print(f"{r['parser']:<13}{r['workers']:>8}{r['files'] / r['wall']:>10.1f}{r['questions'] / r['wall']:>10.0f}"
+              f"{phase_cols}{r['max_rss_kb'] / 1024:>13.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark QuizExtractor throughput')
+    parser.add_argument('--corpus', help='directory of Quiz N folders (default: generate a synthetic corpus)')
+    parser.add_argument('--parsers', nargs='+', choices=PARSER_BACKENDS, default=list(PARSER_BACKENDS))
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument('--quizzes', type=int, default=3, help='synthetic quizzes')
+    parser.add_argument('--files', type=int, default=20, help='synthetic pages per quiz')
+    parser.add_argument('--questions', type=int, default=30, help='synthetic questions per page')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help='synthetic question type weights')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='also write the raw results to this file')
+    parser.add_argument('--run-config', nargs=3, metavar=('PARSER', 'WORKERS', 'RESULT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_config:
+        backend, workers, result_path = args.run_config
+        result = run_config(backend, int(workers), args.corpus)
+        with open(result_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        return
+
+    with tempfile.TemporaryDirectory(prefix='quiz-bench-') as tmp_dir:
+        corpus_dir = args.corpus
+        if not corpus_dir:
+            corpus_dir = tmp_dir
+            paths = generate_corpus(corpus_dir, args.quizzes, args.files, args.questions, args.mix, args.seed)
+            print(f"Generated {len(paths)} synthetic pages ({args.questions} questions each) in {corpus_dir}")
+
+        results = []
+        for backend in args.parsers:
+            for workers in args.workers:
+                results.append(run_config_isolated(backend, workers, corpus_dir))
+        print_report(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Microbenchmark: legacy QuizExtractor.clean_text vs text_normalizer on quiz_database.json.
+
+Usage: python benchmarks/clean_text.py [quiz_database.json] [--repeat N]
+
+Replays the normalization calls the extractor makes per question: the question
+text, each option, both sides of every option/answer comparison in
+_fuzzy_match and the rightanswer feedback with its split answers.
+"""
+import os
+import re
+import sys
+import time
+import argparse
+from typing import List, Dict, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_normalizer import normalize_text
+from sharded_output import load_database
+
+def legacy_clean_text(text: str) -> str:
+    """The original seven-pass clean_text, kept here as the baseline"""
+    if not text:
+        return ""
+    text = re.sub(r'\s+', ' ', text.strip())
+    text = re.sub(r'<[^>]*>', '', text)
+    text = re.sub(r'/p>', '', text)
+    text = re.sub(r'&nbsp;', ' ', text)
+    text = re.sub(r'&amp;', '&', text)
+    text = re.sub(r'&lt;', '<', text)
+    text = re.sub(r'&gt;', '>', text)
+    text = re.sub(r'&quot;', '"', text)
+    return text.strip()
+
+def build_workload(database: Dict[str, Any]) -> List[List[str]]:
+    """Return, per distinct question of an indexed database, the strings clean_text is called with during extraction"""
+    workload = []
+    for q in database['questions'].values():
+        options = [opt['text'] for opt in q.get('options', [])]
+        answers = q.get('correctAnswers', [])
+        calls = [q['question']]
+        calls.append('The correct answer is: ' + ', '.join(answers))
+        calls.extend(answers)
+        for option in options:
+            calls.append(option)
+            for answer in answers:
+                calls.extend((option, answer))
+        workload.append(calls)
+    return workload
+
+def run(clean, workload: List[List[str]]) -> float:
+    start = time.perf_counter()
+    for calls in workload:
+        for text in calls:
+            clean(text)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark clean_text implementations')
+    parser.add_argument('database', nargs='?', default='quiz_database.json')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    workload = build_workload(load_database(args.database))
+    calls = sum(len(c) for c in workload)
+    print(f"{len(workload)} questions, {calls} clean_text calls per pass")
+
+    legacy = min(run(legacy_clean_text, workload) for _ in range(args.repeat))
+
+    def cold():
+        normalize_text.cache_clear()
+        return run(normalize_text, workload)
+    uncached = min(cold() for _ in range(args.repeat))
+    cached = min(run(normalize_text, workload) for _ in range(args.repeat))
+
+    print(f"{'variant':<30}{'total ms':>10}{'µs/question':>14}{'speedup':>9}")
+    for name, elapsed in [('legacy clean_text', legacy),
+                          ('normalize_text (cold cache)', uncached),
+                          ('normalize_text (warm cache)', cached)]:
+        print(f"{name:<30}{elapsed * 1000:>10.2f}{elapsed / len(workload) * 1e6:>14.2f}{legacy / elapsed:>8.1f}x")
+
+if __name__ == '__main__':
+    main()
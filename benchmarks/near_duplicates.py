@@ -0,0 +1,83 @@
+"""Scaling benchmark for MinHash/LSH near-duplicate detection.
+
+Usage: python benchmarks/near_duplicates.py [quiz_database.json] [--sizes 1000 10000 100000]
+
+Builds banks of the requested size from the distinct questions of
+quiz_database.json (indexed, legacy or a sharded manifest.json). Each copy of a
+base question gets random extra words in its text and options, plus a few noisy
+variants (stripped diacritics, changed punctuation, shuffled options). Reports
+clustering time and how many variant groups were reunited.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import unicodedata
+from typing import List, Dict, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from near_duplicates import find_duplicate_clusters
+from sharded_output import load_database
+
+def strip_accents(text: str) -> str:
+    return ''.join(ch for ch in unicodedata.normalize('NFD', text.replace('đ', 'd').replace('Đ', 'D'))
+                   if not unicodedata.combining(ch))
+
+def make_variant(q: Dict[str, Any], rnd: random.Random) -> Dict[str, Any]:
+    text = q['question']
+    if rnd.random() < 0.5:
+        text = strip_accents(text)
+    if rnd.random() < 0.5:
+        text = text.rstrip('?.:') + rnd.choice(['?', ' ?', '.', ':'])
+    options = [dict(opt) for opt in q['options']]
+    rnd.shuffle(options)
+    return {**q, 'question': text, 'options': options}
+
+def build_bank(base: List[Dict[str, Any]], size: int, rnd: random.Random):
+    vocabulary = sorted({word for q in base for word in q['question'].split()})
+    bank, groups = [], []
+    while len(bank) < size:
+        for q in base:
+            # Random extra words make every copy of a base question a genuinely different question
+            def noise():
+                return ' '.join(rnd.choice(vocabulary) for _ in range(6))
+            seed = {
+                **q,
+                'question': f"{q['question']} {noise()}",
+                'options': [{**opt, 'text': f"{opt['text']} {noise()}"} for opt in q['options']]
+            }
+            group = [len(bank)]
+            bank.append(seed)
+            for _ in range(rnd.randint(0, 2)):
+                group.append(len(bank))
+                bank.append(make_variant(seed, rnd))
+            groups.append(group)
+            if len(bank) >= size:
+                break
+    return bank, groups
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark near-duplicate clustering')
+    parser.add_argument('database', nargs='?', default='quiz_database.json')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    base = list(load_database(args.database)['questions'].values())
+
+    print(f"{'questions':>10}{'seconds':>10}{'µs/question':>13}{'clusters':>10}{'groups found':>14}")
+    for size in args.sizes:
+        bank, groups = build_bank(base, size, random.Random(size))
+        start = time.perf_counter()
+        clusters = find_duplicate_clusters(bank)
+        elapsed = time.perf_counter() - start
+
+        cluster_of = {idx: n for n, members in enumerate(clusters) for idx in members}
+        multi = [g for g in groups if len(g) > 1]
+        found = sum(1 for g in multi if g[0] in cluster_of and all(cluster_of.get(i) == cluster_of[g[0]] for i in g))
+        print(f"{len(bank):>10}{elapsed:>10.2f}{elapsed / len(bank) * 1e6:>13.1f}{len(clusters):>10}"
+              f"{found:>7}/{len(multi):<6}")
+
+if __name__ == '__main__':
+    main()
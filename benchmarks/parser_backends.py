@@ -0,0 +1,92 @@
+"""Compare QuizExtractor parser backends on real exported attempt pages.
+
+Usage: python benchmarks/parser_backends.py [HTML files or Quiz directories...]
+
+Each backend runs in a fresh worker process so peak RSS is not polluted by the
+previous backend. Extracted questions are compared against html.parser without
+a strainer (the original behaviour) and any difference is reported.
+"""
+import os
+import sys
+import time
+import resource
+import argparse
+import contextlib
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quiz_extractor import QuizExtractor, PARSER_BACKENDS, find_quiz_dirs, list_html_files
+
+def collect_html_files(paths: List[str]) -> List[str]:
+    """Expand directories into their HTML files"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, f) for f in sorted(list_html_files(path)))
+        else:
+            files.append(path)
+    return files
+
+def run_backend(parser: str, strain: bool, files: List[str]) -> Dict[str, Any]:
+    """Parse and extract every file with one backend, returning timings and results"""
+    parse_time = 0.0
+    extract_time = 0.0
+    results = []
+    tracemalloc.start()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for file_path in files:
+            start = time.perf_counter()
+            extractor = QuizExtractor(file_path, parser, strain)
+            parse_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            results.append(extractor.extract_questions())
+            extract_time += time.perf_counter() - start
+            del extractor
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'parse': parse_time,
+        'extract': extract_time,
+        'py_peak': peak,
+        'max_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'results': results
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark QuizExtractor parser backends')
+    parser.add_argument('paths', nargs='*', help='HTML files or directories (default: every Quiz N directory)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per backend, best time is reported')
+    args = parser.parse_args()
+
+    files = collect_html_files(args.paths or find_quiz_dirs('.'))
+    if not files:
+        sys.exit('No HTML files found')
+    size = sum(os.path.getsize(f) for f in files)
+    print(f"{len(files)} files, {size / 1024:.0f} KB")
+
+    variants = [('html.parser', False)] + [(backend, True) for backend in PARSER_BACKENDS]
+    reference = None
+
+    print(f"{'backend':<22}{'parse s':>10}{'extract s':>11}{'py peak MB':>12}{'max RSS MB':>12}  output")
+    for backend, strain in variants:
+        runs = []
+        for _ in range(args.repeat):
+            # A fresh process per run keeps ru_maxrss specific to this backend
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                runs.append(executor.submit(run_backend, backend, strain, files).result())
+        best = min(runs, key=lambda r: r['parse'] + r['extract'])
+
+        if reference is None:
+            reference = best['results']
+        same = 'identical' if best['results'] == reference else 'DIFFERENT'
+
+        label = backend + ('' if backend == 'lxml-xpath' else (' +strainer' if strain else ''))
+        print(f"{label:<22}{best['parse']:>10.3f}{best['extract']:>11.3f}"
+              f"{best['py_peak'] / 2**20:>12.1f}{best['max_rss'] / 1024:>12.1f}  {same}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Memory footprint of question dicts versus the compact question_model classes.
+
+Usage: python benchmarks/question_memory.py [--database quiz_database.json] [--questions 20000] [--quizzes 5]
+
+Without --database a synthetic indexed bank is generated from the same
+vocabulary as synthetic_pages.py, with each question shared by one or two
+quizzes. The bank is parsed from JSON the way the server and the watcher's
+extraction cache hold it, then measured with tracemalloc for both layouts:
+the indexed bank as dicts versus a QuestionBank, and the per-quiz legacy lists
+as dicts versus Question tuples. The round trip back to JSON is checked to be
+byte-identical.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+from typing import Dict, Any, Callable, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from question_model import QuestionBank, compact_questions, expand_questions
+from question_index import expand_indexed_database
+from synthetic_pages import TOPICS, WORDS, DEFAULT_MIX
+
+SHARED_OPTIONS = ['Tất cả các đáp án trên', 'Không có đáp án nào đúng', 'All of the above']
+
+def synthetic_bank(questions: int, quizzes: int, seed: int = 0) -> Dict[str, Any]:
+    """Return an indexed database of generated questions"""
+    rnd = random.Random(seed)
+    sentence = lambda words: ' '.join(rnd.choice(WORDS) for _ in range(words))
+    bank = {}
+    for slot in range(questions):
+        qtype = rnd.choices(list(DEFAULT_MIX), list(DEFAULT_MIX.values()))[0]
+        text = f"{rnd.choice(TOPICS).capitalize()} {sentence(rnd.randint(6, 14))} (câu {slot})?"
+        if qtype == 'essay':
+            options = []
+        elif qtype == 'truefalse':
+            options = [{'text': 'True', 'isCorrect': False}, {'text': 'False', 'isCorrect': False}]
+            options[rnd.randrange(2)]['isCorrect'] = True
+        else:
+            count = rnd.randint(3, 5)
+            texts = [f"{sentence(rnd.randint(2, 6))} {chr(65 + idx)}{slot}" for idx in range(count)]
+            if rnd.random() < 0.2:
+                texts[-1] = rnd.choice(SHARED_OPTIONS)
+            correct = set(rnd.sample(range(count), rnd.randint(2, 3) if qtype == 'multiple' else 1))
+            options = [{'text': t, 'isCorrect': idx in correct} for idx, t in enumerate(texts)]
+        bank[f"{slot:012x}"] = {
+            'question': text,
+            'type': qtype,
+            'options': options,
+            'correctAnswers': [option['text'] for option in options if option['isCorrect']]
+        }
+    ids = list(bank)
+    quiz_ids = {f"Quiz {n + 1}": [] for n in range(quizzes)}
+    for qid in ids:
+        for quiz_name in rnd.sample(list(quiz_ids), rnd.choice([1, 1, 1, 2])):
+            quiz_ids[quiz_name].append(qid)
+    return {'version': 2, 'questions': bank, 'quizzes': quiz_ids}
+
+def measure(build: Callable[[], Any]) -> Tuple[Any, int, float]:
+    """Return what build() made, the memory it still holds and the seconds it took"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the memory of question dicts and question_model')
+    parser.add_argument('--database', help='indexed or legacy database JSON (default: generate a synthetic bank)')
+    parser.add_argument('--questions', type=int, default=20000, help='synthetic questions')
+    parser.add_argument('--quizzes', type=int, default=5, help='synthetic quizzes')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.database:
+        with open(args.database, 'r', encoding='utf-8') as f:
+            raw = f.read()
+    else:
+        raw = json.dumps(synthetic_bank(args.questions, args.quizzes, args.seed), ensure_ascii=False)
+    # Minified indexed layout, so the round trip can be compared byte for byte
+    database = json.loads(raw)
+    if 'quizzes' not in database:
+        database = QuestionBank.from_database(database).to_database()
+    raw = json.dumps(database, ensure_ascii=False)
+    legacy_raw = json.dumps(expand_indexed_database(database), ensure_ascii=False)
+    del database
+
+    # Each form is measured alone: interned strings still held by a previous one would not be counted
+    rows = []
+    database, dict_bytes, dict_seconds = measure(lambda: json.loads(raw))
+    del database
+    bank, bank_bytes, bank_seconds = measure(lambda: QuestionBank.from_database(json.loads(raw)))
+    rows.append(('indexed bank', dict_bytes, bank_bytes, dict_seconds, bank_seconds))
+    question_count, quiz_count = len(bank), len(bank.quizzes)
+    lossless = json.dumps(bank.to_database(), ensure_ascii=False) == raw
+    del bank
+
+    legacy, legacy_bytes, legacy_seconds = measure(lambda: json.loads(legacy_raw))
+    del legacy
+    compact, compact_bytes, compact_seconds = measure(
+        lambda: {quiz_name: compact_questions(qs) for quiz_name, qs in json.loads(legacy_raw).items()})
+    rows.append(('per-quiz lists', legacy_bytes, compact_bytes, legacy_seconds, compact_seconds))
+    lossless &= json.dumps({name: expand_questions(qs) for name, qs in compact.items()}, ensure_ascii=False) == legacy_raw
+
+    print(f"{question_count} questions in {quiz_count} quizzes ({len(raw) / 1024 / 1024:.1f} MB of JSON)")
+    print(f"{'layout':<16}{'dicts MB':>10}{'model MB':>10}{'saved':>8}{'dicts load s':>14}{'model load s':>14}")
+    for label, before, after, before_s, after_s in rows:
+        print(f"{label:<16}{before / 1024 / 1024:>10.1f}{after / 1024 / 1024:>10.1f}{1 - after / before:>8.0%}"
+              f"{before_s:>14.3f}{after_s:>14.3f}")
+    print(f"Round trip to JSON is {'byte-identical' if lossless else 'NOT identical'}")
+
+if __name__ == '__main__':
+    main()
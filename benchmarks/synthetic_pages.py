@@ -0,0 +1,152 @@
+"""Synthetic Moodle attempt-page generator for offline benchmarks.
+
+Usage: python benchmarks/synthetic_pages.py OUT_DIR [--quizzes 3] [--files 20] [--questions 30]
+
+Writes OUT_DIR/Quiz N/attempt-M.html pages shaped like Moodle review pages:
+div.que containers with qtext, an answer block of r0/r1 option rows (radio,
+checkbox or true/false inputs, with correct/incorrect marks on the student's
+choices) and a rightanswer feedback block in one of the formats
+QuizExtractor._extract_correct_answers_from_feedback understands.
+"""
+import os
+import html
+import random
+import argparse
+from typing import Dict, List
+
+DEFAULT_MIX = {'single': 0.5, 'multiple': 0.25, 'truefalse': 0.15, 'essay': 0.1}
+
+TOPICS = [
+    'điện toán đám mây', 'hypervisor', 'máy ảo', 'virtualization', 'SaaS', 'PaaS', 'IaaS',
+    'storage area network', 'load balancing', 'container', 'MapReduce', 'độ sẵn sàng cao'
+]
+WORDS = [
+    'hệ thống', 'dịch vụ', 'tài nguyên', 'mạng', 'bộ nhớ', 'resource', 'pool', 'tenant',
+    'kernel', 'driver', 'cluster', 'node', 'scheduler', 'latency', 'throughput', 'quản lý'
+]
+
+def _sentence(rnd: random.Random, words: int) -> str:
+    return ' '.join(rnd.choice(WORDS) for _ in range(words))
+
+def _feedback_html(rnd: random.Random, qtype: str, answers: List[str]) -> str:
+    """Render a rightanswer block in one of the supported feedback formats"""
+    if qtype == 'truefalse':
+        text = rnd.choice([f'Đáp án chính xác là "{answers[0]}"', f'The correct answer is "{answers[0]}"'])
+    elif len(answers) > 1:
+        text = rnd.choice([
+            'The correct answers are: ' + ', '.join(answers),
+            'Các đáp án đúng là: ' + '; '.join(answers),
+        ])
+    else:
+        text = rnd.choice([
+            f'The correct answer is: {answers[0]}',
+            f'Đáp án đúng là: {answers[0]}',
+            f'The correct answer is {answers[0]}',
+        ])
+    return (f'<div class="outcome clearfix"><h4 class="accesshide">Feedback</h4><div class="feedback">'
+            f'<div class="rightanswer">{html.escape(text)}</div></div></div>')
+
+def generate_question(rnd: random.Random, slot: int, qtype: str, feedback_rate: float = 0.9) -> str:
+    """Render one question container of the given type"""
+    qid = f"{rnd.randint(100, 999)}-{slot}"
+    text = f"{rnd.choice(TOPICS).capitalize()} {_sentence(rnd, rnd.randint(6, 14))} (câu {slot})?"
+    state = rnd.choice(['correct', 'incorrect', 'partiallycorrect'])
+    container_class = 'multichoice' if qtype in ('single', 'multiple') else qtype
+    head = (f'<div id="question-{qid}" class="que {container_class} deferredfeedback {state}"><div class="info">'
+            f'<h3 class="no">Question <span class="qno">{slot}</span></h3><div class="state">Complete</div>'
+            f'<div class="questionflag editable"></div></div><div class="content">'
+            f'<div class="formulation clearfix"><h4 class="accesshide">Question text</h4>'
+            f'<div class="qtext"><p>{html.escape(text)}</p></div>')
+
+    if qtype == 'essay':
+        return (head + f'<div class="ablock"><div class="answer"><div class="qtype_essay_response">'
+                f'{html.escape(_sentence(rnd, 30))}</div></div></div></div></div></div>')
+
+    if qtype == 'truefalse':
+        correct = rnd.randrange(2)
+        chosen = rnd.randrange(2)
+        rows = []
+        for idx, (suffix, label) in enumerate([('true', 'Đúng'), ('false', 'Sai')]):
+            mark = (' correct' if idx == correct else ' incorrect') if idx == chosen else ''
+            checked = ' checked="checked"' if idx == chosen else ''
+            rows.append(f'<div class="r{idx}{mark}"><input type="radio" name="q{qid}_answer" value="{1 - idx}" '
+                        f'id="q{qid}_answer{suffix}"{checked}>'
+                        f'<label for="q{qid}_answer{suffix}" class="ml-1">{label}</label></div>')
+        answers = ['Đúng' if correct == 0 else 'Sai']
+    else:
+        count = rnd.randint(3, 5)
+        options = [f"{_sentence(rnd, rnd.randint(2, 6))} {chr(65 + idx)}{slot}" for idx in range(count)]
+        correct = set(rnd.sample(range(count), rnd.randint(2, 3) if qtype == 'multiple' else 1))
+        chosen = set(rnd.sample(range(count), len(correct)))
+        input_type = 'checkbox' if qtype == 'multiple' else 'radio'
+        rows = []
+        for idx, option in enumerate(options):
+            mark = (' correct' if idx in correct else ' incorrect') if idx in chosen else ''
+            checked = ' checked="checked"' if idx in chosen else ''
+            rows.append(f'<div class="r{idx % 2}{mark}"><input type="{input_type}" name="q{qid}_choice{idx}" value="1" '
+                        f'id="q{qid}_choice{idx}"{checked}><div class="d-flex w-auto" data-region="answer-label">'
+                        f'<span class="answernumber">{chr(97 + idx)}. </span><div class="flex-fill ml-1">'
+                        f'<p>{html.escape(option)}</p></div></div></div>')
+        answers = [options[idx] for idx in sorted(correct)]
+
+    body = (head + '<div class="ablock"><div class="prompt">Select one:</div><div class="answer">'
+            + ''.join(rows) + '</div></div></div>')
+    if rnd.random() < feedback_rate:
+        body += _feedback_html(rnd, qtype, answers)
+    return body + '</div></div>'
+
+def generate_page(rnd: random.Random, questions: int, mix: Dict[str, float] = DEFAULT_MIX,
+                  feedback_rate: float = 0.9) -> str:
+    """Render a full attempt review page with the given number of questions"""
+    types = list(mix)
+    weights = [mix[t] for t in types]
+    containers = ''.join(generate_question(rnd, slot, rnd.choices(types, weights)[0], feedback_rate)
+                         for slot in range(1, questions + 1))
+    return ('<!DOCTYPE html><html dir="ltr" lang="vi"><head><meta charset="utf-8"><title>Review attempt</title>'
+            '<link rel="stylesheet" href="styles.css"></head><body id="page-mod-quiz-review">'
+            '<div id="page-wrapper"><nav class="navbar">' + _sentence(rnd, 20) + '</nav>'
+            '<div id="page"><div id="region-main"><form action="review.php" method="post">'
+            f'<div>{containers}</div></form></div></div>'
+            '<footer id="page-footer">' + _sentence(rnd, 40) + '</footer></div></body></html>')
+
+def generate_corpus(out_dir: str, quizzes: int = 3, files: int = 20, questions: int = 30,
+                    mix: Dict[str, float] = DEFAULT_MIX, seed: int = 0) -> List[str]:
+    """Write a 'Quiz N' directory tree of attempt pages and return the file paths"""
+    rnd = random.Random(seed)
+    paths = []
+    for quiz in range(1, quizzes + 1):
+        quiz_dir = os.path.join(out_dir, f'Quiz {quiz}')
+        os.makedirs(quiz_dir, exist_ok=True)
+        for attempt in range(1, files + 1):
+            path = os.path.join(quiz_dir, f'attempt-{attempt}.html')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(generate_page(rnd, questions, mix))
+            paths.append(path)
+    return paths
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse 'single=5,multiple=3,truefalse=1,essay=1' into a weight mapping"""
+    mix = {}
+    for part in value.split(','):
+        qtype, _, weight = part.partition('=')
+        if qtype not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown question type '{qtype}'")
+        mix[qtype] = float(weight or 1)
+    return mix
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic Moodle attempt pages')
+    parser.add_argument('out_dir')
+    parser.add_argument('--quizzes', type=int, default=3)
+    parser.add_argument('--files', type=int, default=20, help='attempt pages per quiz')
+    parser.add_argument('--questions', type=int, default=30, help='questions per page')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='question type weights, e.g. single=5,multiple=3,truefalse=1,essay=1')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    paths = generate_corpus(args.out_dir, args.quizzes, args.files, args.questions, args.mix, args.seed)
+    print(f"Wrote {len(paths)} pages to {args.out_dir}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+import os
+import json
+import hashlib
+from typing import List, Dict, Any, Optional, Iterable
+from question_model import compact_questions, expand_questions
+from sharded_output import write_atomic
+
+class ExtractionCache:
+    def __init__(self, cache_file: str, version: str):
+        """On-disk cache of extracted questions keyed by file path, parser, stream mode, content hash and extractor version
+
+        In memory the questions are held as compact Question objects, which
+        matters for the watcher, where the cache lives as long as the daemon.
+        """
+        self.cache_file = cache_file
+        self.version = version
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        """Return the SHA-256 of a file's content"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _key(file_path: str, parser: str, stream: bool) -> str:
+        # Parser backends can extract a page differently, so each one gets its own entry
+        return f"{parser}|{'stream' if stream else 'tree'}|{os.path.abspath(file_path)}"
+
+    @staticmethod
+    def _path_of(key: str) -> str:
+        return key.split('|', 2)[-1]
+
+    def load(self) -> 'ExtractionCache':
+        """Load entries from disk, silently starting empty if the file is missing or unreadable"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return self
+
+        # Entries written by another extractor version can never hit, so drop them
+        if data.get('version') == self.version:
+            self.entries = {key: {'hash': entry['hash'], 'questions': compact_questions(entry['questions'])}
+                            for key, entry in data.get('files', {}).items()}
+        else:
+            self._dirty = True
+        return self
+
+    def get(self, file_path: str, content_hash: str, parser: str, stream: bool) -> Optional[List[Dict[str, Any]]]:
+        """Return fresh question dicts for this file content as extracted by this parser and mode, or None"""
+        entry = self.entries.get(self._key(file_path, parser, stream))
+        if entry and entry.get('hash') == content_hash:
+            self.hits += 1
+            return expand_questions(entry['questions'])
+        self.misses += 1
+        return None
+
+    def has(self, file_path: str, content_hash: str, parser: str, stream: bool) -> bool:
+        """Whether get() would hit, without counting a hit or a miss"""
+        return self.entries.get(self._key(file_path, parser, stream), {}).get('hash') == content_hash
+
+    def reset_stats(self):
+        """Zero the hit/miss counters, e.g. before another rebuild with the same cache"""
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, file_path: str, content_hash: str, parser: str, stream: bool, questions: List[Dict[str, Any]]):
+        """Store a file's extracted questions (converted, so later changes to the dicts do not leak in)"""
+        self.entries[self._key(file_path, parser, stream)] = {
+            'hash': content_hash,
+            'questions': compact_questions(questions)
+        }
+        self._dirty = True
+
+    def prune(self, file_paths: Iterable[str]):
+        """Forget files that are no longer part of the build, whichever parser extracted them"""
+        keep = {os.path.abspath(p) for p in file_paths}
+        stale = [key for key in self.entries if self._path_of(key) not in keep]
+        for key in stale:
+            del self.entries[key]
+        if stale:
+            self._dirty = True
+
+    def save(self):
+        """Atomically write the cache back to disk if anything changed"""
+        if not self._dirty:
+            return
+        files = {key: {'hash': entry['hash'], 'questions': expand_questions(entry['questions'])}
+                 for key, entry in self.entries.items()}
+        write_atomic(self.cache_file, json.dumps({'version': self.version, 'files': files}, ensure_ascii=False).encode('utf-8'))
+        self._dirty = False
@@ -0,0 +1,141 @@
+import struct
+import hashlib
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple, Set
+from collections import defaultdict
+from text_normalizer import fold_text
+from answer_matching import question_answer_index
+
+# 64 MinHash values split into 16 LSH bands of 4 rows: pairs around 0.5 Jaccard
+# similarity already collide in some band, and candidates are then checked
+# against the requested threshold using the signatures themselves
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+DEFAULT_SIMILARITY = 0.8
+
+_HASH_FORMAT = struct.Struct(f'<{NUM_PERMUTATIONS}I')
+_EMPTY_SIGNATURE = tuple([0xFFFFFFFF] * NUM_PERMUTATIONS)
+
+@lru_cache(maxsize=1 << 16)
+def _shingle_hashes(shingle: str) -> Tuple[int, ...]:
+    """Hash one shingle under all permutations at once
+
+    Each 32-bit lane of a SHAKE-128 digest acts as an independent hash
+    function, which is deterministic across runs and processes and avoids a
+    Python-level loop per permutation.
+    """
+    return _HASH_FORMAT.unpack(hashlib.shake_128(shingle.encode('utf-8')).digest(_HASH_FORMAT.size))
+
+def question_shingles(q: Dict[str, Any]) -> Set[str]:
+    """Return the word-bigram shingles of a question's text and its option set
+
+    Text is diacritic- and punctuation-folded and the options are sorted, so
+    the same question exported with different accents, punctuation or option
+    order produces the same shingles.
+    """
+    words = fold_text(q.get('question', '')).split()
+    options = sorted(fold_text(opt['text']) for opt in q.get('options', []))
+    words.append('|' + q.get('type', ''))
+    for option in options:
+        words.append('|')
+        words.extend(option.split())
+    if len(words) < 2:
+        return set(words)
+    return {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+def minhash_signature(shingles: Set[str]) -> Tuple[int, ...]:
+    """Return the MinHash signature of a set of shingles"""
+    if not shingles:
+        return _EMPTY_SIGNATURE
+    # Column-wise minimum over every shingle's hash row
+    return tuple(map(min, zip(*map(_shingle_hashes, shingles))))
+
+def _estimated_similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERMUTATIONS
+
+def _find(parent: List[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+def find_duplicate_clusters(questions: List[Dict[str, Any]], threshold: float = DEFAULT_SIMILARITY) -> List[List[int]]:
+    """Group near-duplicate questions and return clusters of indices (only clusters of two or more)
+
+    Questions with identical signatures are merged directly; the remaining
+    signatures are bucketed by LSH band, and only questions sharing a bucket
+    are compared, so the cost grows with the number of questions rather than
+    the number of pairs.
+    """
+    parent = list(range(len(questions)))
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+
+    # Exact signature matches collapse first so large groups of copies never reach pairwise checks
+    first_by_signature = {}
+    signatures = []
+    for idx, q in enumerate(questions):
+        signature = minhash_signature(question_shingles(q))
+        if signature in first_by_signature:
+            parent[idx] = first_by_signature[signature]
+        else:
+            first_by_signature[signature] = idx
+            signatures.append((idx, signature))
+
+    buckets = defaultdict(list)
+    for idx, signature in signatures:
+        for band in range(LSH_BANDS):
+            buckets[(band, signature[band * rows:(band + 1) * rows])].append((idx, signature))
+
+    compared = set()
+    for members in buckets.values():
+        for pos, (idx_a, sig_a) in enumerate(members):
+            for idx_b, sig_b in members[pos + 1:]:
+                if (idx_a, idx_b) in compared:
+                    continue
+                compared.add((idx_a, idx_b))
+                root_a, root_b = _find(parent, idx_a), _find(parent, idx_b)
+                if root_a != root_b and _estimated_similarity(sig_a, sig_b) >= threshold:
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    clusters = defaultdict(list)
+    for idx in range(len(questions)):
+        clusters[_find(parent, idx)].append(idx)
+    return [members for members in clusters.values() if len(members) > 1]
+
+def question_quality(q: Dict[str, Any]) -> tuple:
+    """Rank a question by how well it validates; higher is better"""
+    options = q.get('options', [])
+    correct_answers = q.get('correctAnswers', [])
+    answers_match = bool(options) and not question_answer_index(q).unmatched_answers(correct_answers)
+    return (
+        q.get('type') == 'essay' or bool(correct_answers),
+        q.get('type') not in ['single', 'multiple'] or bool(options),
+        answers_match,
+        len(options),
+    )
+
+def remove_near_duplicate_questions(questions: List[Dict[str, Any]],
+                                    threshold: float = DEFAULT_SIMILARITY) -> Tuple[List[Dict[str, Any]], List[List[Dict[str, Any]]]]:
+    """Collapse near-duplicate questions to their best-validated representative
+
+    Returns the surviving questions (in first-occurrence order of each cluster)
+    and the duplicate clusters, each listing the representative first.
+    """
+    clusters = find_duplicate_clusters(questions, threshold)
+    representative = {}
+    dropped = set()
+    reported = []
+    for members in clusters:
+        # max() keeps the earliest member on ties
+        best = max(members, key=lambda idx: question_quality(questions[idx]))
+        representative[members[0]] = best
+        dropped.update(members)
+        reported.append([questions[best]] + [questions[idx] for idx in members if idx != best])
+
+    unique_questions = []
+    for idx, q in enumerate(questions):
+        if idx in representative:
+            unique_questions.append(questions[representative[idx]])
+        elif idx not in dropped:
+            unique_questions.append(q)
+    return unique_questions, reported
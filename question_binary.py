@@ -0,0 +1,318 @@
+import sys
+import json
+import mmap
+import time
+import struct
+import argparse
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+from question_index import build_indexed_database, DATABASE_FORMAT_VERSION
+from question_model import Question
+from sharded_output import load_database, write_atomic
+
+BINARY_MAGIC = b'QBNK'
+
+# Version of the binary layout written by write_binary_database
+BINARY_FORMAT_VERSION = 1
+
+BINARY_DATABASE_FILE = 'quiz_database.qbank'
+
+# magic, format version, database version, ID width, then the counts of
+# questions, strings, options, answers, quizzes and quiz members, then the
+# byte offset of each section
+HEADER = struct.Struct('<4sHHH2x6I8Q')
+SECTIONS = ('string_offsets', 'string_data', 'questions', 'id_index', 'options', 'answers', 'quizzes', 'members')
+
+# text, type, first option, first answer, option count, answer count, extra keys (JSON)
+QUESTION_FIELDS = '<IIIIHHI'
+# text, isCorrect
+OPTION_RECORD = struct.Struct('<IB')
+# name, first member, member count
+QUIZ_RECORD = struct.Struct('<III')
+U32 = struct.Struct('<I')
+
+NO_STRING = 0xFFFFFFFF
+# Answer count of a question whose correctAnswers are exactly its options marked correct
+DERIVED_ANSWERS = 0xFFFF
+
+def _question_record(id_width: int) -> struct.Struct:
+    """Fixed-width question record: the NUL-padded ID followed by QUESTION_FIELDS"""
+    return struct.Struct(f'<{id_width}s{QUESTION_FIELDS[1:]}')
+
+def build_binary_database(database: Dict[str, Any]) -> bytes:
+    """Encode an indexed (or legacy) database in the binary layout
+
+    Every distinct string (question and option texts, types, answers, quiz
+    names) is stored once in a string table and referenced by number.
+    Questions, options, answers and quiz members are fixed-width records, so
+    a reader finds any of them by offset arithmetic; the ID index lists the
+    question records sorted by ID for binary search. Questions keep the
+    database's order, so decoding reproduces the original JSON exactly.
+    """
+    if 'quizzes' not in database:
+        database = build_indexed_database(database)
+    strings = {}
+    def string_ref(text: str) -> int:
+        return strings.setdefault(text, len(strings))
+
+    ids = [qid.encode('utf-8') for qid in database['questions']]
+    id_width = max(map(len, ids), default=0)
+    if b'\0' in b''.join(ids):
+        raise ValueError('Question IDs must not contain NUL characters')
+    question_record = _question_record(id_width)
+    question_bytes = bytearray()
+    option_bytes = bytearray()
+    answer_bytes = bytearray()
+    option_count = answer_count = 0
+    for qid, q in zip(ids, database['questions'].values()):
+        question = Question.from_dict(q)
+        if len(question.option_texts) >= DERIVED_ANSWERS or len(question.answers or ()) >= DERIVED_ANSWERS:
+            raise ValueError(f"Question {qid.decode('utf-8')} has too many options or answers")
+        answers = question.answers
+        extra = json.dumps(question.extra, ensure_ascii=False, separators=(',', ':')) if question.extra else None
+        question_bytes += question_record.pack(
+            qid, string_ref(question.text), string_ref(question.type), option_count, answer_count,
+            len(question.option_texts), DERIVED_ANSWERS if answers is None else len(answers),
+            NO_STRING if extra is None else string_ref(extra))
+        for idx, text in enumerate(question.option_texts):
+            option_bytes += OPTION_RECORD.pack(string_ref(text), question.is_correct(idx))
+        option_count += len(question.option_texts)
+        for answer in answers or ():
+            answer_bytes += U32.pack(string_ref(answer))
+        answer_count += len(answers or ())
+
+    record_numbers = {qid: number for number, qid in enumerate(database['questions'])}
+    id_index = b''.join(U32.pack(record_numbers[qid]) for qid in sorted(record_numbers, key=lambda qid: qid.encode('utf-8')))
+    quiz_bytes = bytearray()
+    member_bytes = bytearray()
+    member_count = 0
+    for quiz_name, quiz_ids in database['quizzes'].items():
+        quiz_bytes += QUIZ_RECORD.pack(string_ref(quiz_name), member_count, len(quiz_ids))
+        member_bytes += b''.join(U32.pack(record_numbers[qid]) for qid in quiz_ids)
+        member_count += len(quiz_ids)
+
+    encoded = [text.encode('utf-8') for text in strings]
+    string_offsets = bytearray(U32.pack(0))
+    end = 0
+    for data in encoded:
+        end += len(data)
+        string_offsets += U32.pack(end)
+    if end > NO_STRING:
+        raise ValueError('String table exceeds 4 GiB')
+
+    sections = [string_offsets, b''.join(encoded), question_bytes, id_index, option_bytes, answer_bytes,
+                quiz_bytes, member_bytes]
+    offsets = []
+    position = HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+    header = HEADER.pack(BINARY_MAGIC, BINARY_FORMAT_VERSION, database.get('version', DATABASE_FORMAT_VERSION),
+                         id_width, len(ids), len(strings), option_count, answer_count,
+                         len(database['quizzes']), member_count, *offsets)
+    return b''.join([header, *sections])
+
+def write_binary_database(database: Dict[str, Any], path: str) -> int:
+    """Write the binary form of a database atomically and return its size"""
+    payload = build_binary_database(database)
+    write_atomic(path, payload)
+    return len(payload)
+
+class BinaryQuestionBank:
+    def __init__(self, path: str):
+        """Read-only, memory-mapped view of a file written by write_binary_database
+
+        Opening only reads the header; a question is decoded from its records
+        when asked for, and lookups by ID binary-search the ID index, so the
+        cost of a lookup does not grow with the size of the bank and the
+        untouched parts of the file are never read from disk.
+        """
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        if len(self._map) < HEADER.size or self._map[:len(BINARY_MAGIC)] != BINARY_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a binary question bank")
+        fields = HEADER.unpack_from(self._map)
+        if fields[1] != BINARY_FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported binary question bank version {fields[1]}")
+        (_, _, self.version, self.id_width, self.question_count, self.string_count,
+         self.option_count, self.answer_count, self.quiz_count, self.member_count) = fields[:10]
+        self._offsets = dict(zip(SECTIONS, fields[10:]))
+        self._question_record = _question_record(self.id_width)
+
+    def close(self):
+        self._view.release()
+        self._map.close()
+
+    def __enter__(self) -> 'BinaryQuestionBank':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _string(self, ref: int) -> str:
+        start, end = struct.unpack_from('<II', self._map, self._offsets['string_offsets'] + 4 * ref)
+        base = self._offsets['string_data']
+        return str(self._view[base + start:base + end], 'utf-8')
+
+    def _record(self, number: int) -> tuple:
+        return self._question_record.unpack_from(self._map, self._offsets['questions'] + number * self._question_record.size)
+
+    def _record_id(self, number: int) -> str:
+        return self._record(number)[0].rstrip(b'\0').decode('utf-8')
+
+    def _find(self, qid: str) -> Optional[int]:
+        """Record number of a question ID, or None"""
+        key = qid.encode('utf-8')
+        if len(key) > self.id_width:
+            return None
+        key = key.ljust(self.id_width, b'\0')
+        index, record_size = self._offsets['id_index'], self._question_record.size
+        low, high = 0, self.question_count
+        while low < high:
+            mid = (low + high) // 2
+            number = U32.unpack_from(self._map, index + 4 * mid)[0]
+            start = self._offsets['questions'] + number * record_size
+            found = self._map[start:start + self.id_width]
+            if found < key:
+                low = mid + 1
+            elif found > key:
+                high = mid
+            else:
+                return number
+        return None
+
+    def _decode(self, number: int) -> Question:
+        _, text, qtype, first_option, first_answer, option_count, answer_count, extra = self._record(number)
+        option_texts = []
+        correct_mask = 0
+        for idx in range(option_count):
+            ref, is_correct = OPTION_RECORD.unpack_from(self._map, self._offsets['options'] + (first_option + idx) * OPTION_RECORD.size)
+            option_texts.append(self._string(ref))
+            correct_mask |= is_correct << idx
+        answers = None
+        if answer_count != DERIVED_ANSWERS:
+            base = self._offsets['answers'] + 4 * first_answer
+            answers = [self._string(U32.unpack_from(self._map, base + 4 * idx)[0]) for idx in range(answer_count)]
+        return Question(self._string(text), self._string(qtype), option_texts, correct_mask, answers,
+                        json.loads(self._string(extra)) if extra != NO_STRING else None)
+
+    def __len__(self) -> int:
+        return self.question_count
+
+    def __contains__(self, qid: str) -> bool:
+        return self._find(qid) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        """Question IDs in the database's order"""
+        return (self._record_id(number) for number in range(self.question_count))
+
+    def record(self, qid: str) -> Question:
+        """Return one question as a question_model.Question (KeyError when unknown)"""
+        number = self._find(qid)
+        if number is None:
+            raise KeyError(qid)
+        return self._decode(number)
+
+    def question(self, qid: str) -> Dict[str, Any]:
+        """Return one question as a dict in the JSON schema (KeyError when unknown)"""
+        return self.record(qid).to_dict()
+
+    def questions_of(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Return {id: question dict} for the given IDs, skipping unknown ones"""
+        questions = {}
+        for qid in ids:
+            number = self._find(qid)
+            if number is not None:
+                questions[qid] = self._decode(number).to_dict()
+        return questions
+
+    def _quiz(self, position: int) -> Tuple[str, int, int]:
+        name, first_member, count = QUIZ_RECORD.unpack_from(self._map, self._offsets['quizzes'] + position * QUIZ_RECORD.size)
+        return self._string(name), first_member, count
+
+    @property
+    def quiz_names(self) -> List[str]:
+        return [self._quiz(position)[0] for position in range(self.quiz_count)]
+
+    def quiz_ids(self, quiz_name: str) -> Optional[List[str]]:
+        """Return the question IDs of a quiz in order, or None for an unknown quiz"""
+        for position in range(self.quiz_count):
+            name, first_member, count = self._quiz(position)
+            if name == quiz_name:
+                base = self._offsets['members'] + 4 * first_member
+                return [self._record_id(U32.unpack_from(self._map, base + 4 * idx)[0]) for idx in range(count)]
+        return None
+
+    def to_database(self) -> Dict[str, Any]:
+        """Decode the whole bank into the indexed JSON layout"""
+        return {
+            'version': self.version,
+            'questions': {self._record_id(number): self._decode(number).to_dict() for number in range(self.question_count)},
+            'quizzes': {name: self.quiz_ids(name) for name in self.quiz_names}
+        }
+
+def verify_binary_database(database: Dict[str, Any], path: str) -> List[str]:
+    """Compare a binary bank with the database it was written from; returns the differences"""
+    if 'quizzes' not in database:
+        database = build_indexed_database(database)
+    problems = []
+    with BinaryQuestionBank(path) as bank:
+        if bank.version != database.get('version', DATABASE_FORMAT_VERSION):
+            problems.append(f"version {bank.version} != {database.get('version')}")
+        if list(bank) != list(database['questions']):
+            problems.append('question IDs or their order differ')
+        for qid, q in database['questions'].items():
+            if qid not in bank or bank.question(qid) != q:
+                problems.append(f"question {qid} differs")
+        if bank.quiz_names != list(database['quizzes']):
+            problems.append('quiz names or their order differ')
+        for quiz_name, ids in database['quizzes'].items():
+            if bank.quiz_ids(quiz_name) != ids:
+                problems.append(f"quiz {quiz_name!r} lists different questions")
+        decoded = json.dumps(bank.to_database(), ensure_ascii=False)
+    if not problems and decoded != json.dumps(database, ensure_ascii=False):
+        problems.append('decoded JSON is not identical')
+    return problems
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Export the question bank to a memory-mappable binary file, or read from one')
+    parser.add_argument('--database', default='quiz_database.json',
+                        help='indexed or legacy database, or a quiz_db/manifest.json (default: quiz_database.json)')
+    parser.add_argument('--output', default=BINARY_DATABASE_FILE,
+                        help=f'binary bank to write or read (default: {BINARY_DATABASE_FILE})')
+    parser.add_argument('--no-verify', action='store_true', help='skip the round-trip check after exporting')
+    parser.add_argument('--lookup', nargs='+', metavar='ID',
+                        help='print these questions from an existing binary bank instead of exporting')
+    args = parser.parse_args(argv)
+
+    if args.lookup:
+        start = time.perf_counter()
+        with BinaryQuestionBank(args.output) as bank:
+            questions = {qid: bank.question(qid) for qid in args.lookup if qid in bank}
+        elapsed = (time.perf_counter() - start) * 1000
+        print(json.dumps(questions, ensure_ascii=False, indent=2))
+        print(f"🔎 Found {len(questions)}/{len(args.lookup)} questions in {elapsed:.2f} ms", file=sys.stderr)
+        return
+
+    start = time.perf_counter()
+    database = load_database(args.database)
+    load_seconds = time.perf_counter() - start
+    size = write_binary_database(database, args.output)
+    print(f"💾 Wrote {len(database['questions'])} questions to {args.output} ({size / 1024:.1f} KB)")
+    start = time.perf_counter()
+    with BinaryQuestionBank(args.output) as bank:
+        open_seconds = time.perf_counter() - start
+    print(f"⏱️  Loading {args.database}: {load_seconds * 1000:.1f} ms, opening {args.output}: {open_seconds * 1000:.2f} ms")
+    if args.no_verify:
+        return
+    problems = verify_binary_database(database, args.output)
+    if problems:
+        for problem in problems[:10]:
+            print(f"    ❌ {problem}")
+        sys.exit(f"❌ {args.output} does not round-trip ({len(problems)} differences)")
+    print(f"✅ {args.output} decodes to the same JSON as {args.database}")
+
+if __name__ == '__main__':
+    main()
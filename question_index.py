@@ -0,0 +1,81 @@
+import hashlib
+from typing import List, Dict, Any
+from collections import defaultdict
+from text_normalizer import WHITESPACE_PATTERN
+from near_duplicates import find_duplicate_clusters, question_quality, DEFAULT_SIMILARITY
+
+# Version of the indexed database layout written by build_indexed_database
+DATABASE_FORMAT_VERSION = 2
+
+QUESTION_ID_LENGTH = 12
+
+def question_key(q: Dict[str, Any]) -> str:
+    """Return the exact-duplicate key of a question: its lowercased, whitespace-normalized text"""
+    return WHITESPACE_PATTERN.sub(' ', q['question'].lower().strip())
+
+def question_id(q: Dict[str, Any]) -> str:
+    """Return a stable, content-derived ID for a question
+
+    Derived from question_key and the question's normalized option texts in
+    sorted order, so re-extracting the same question from any quiz or attempt
+    page (whatever its option order) yields the same ID, while questions that
+    only share their text keep separate IDs.
+    """
+    options = sorted(WHITESPACE_PATTERN.sub(' ', option['text'].lower().strip()) for option in q.get('options', []))
+    identity = '\n'.join([question_key(q)] + options)
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()[:QUESTION_ID_LENGTH]
+
+def build_indexed_database(all_quiz_data: Dict[str, List[Dict[str, Any]]], dedup: str = 'exact',
+                           similarity: float = DEFAULT_SIMILARITY) -> Dict[str, Any]:
+    """Deduplicate questions across all quizzes and reference them by ID
+
+    Returns {'version', 'questions': {id: question}, 'quizzes': {quiz: [ids]}}.
+    Each question is stored once; when several quizzes hold different copies of
+    the same question the best-validated copy is kept. With dedup='near',
+    near-duplicates across quizzes are also folded into one ID.
+    """
+    questions = {}
+    quizzes = {}
+    for quiz_name, quiz_questions in all_quiz_data.items():
+        ids = []
+        for q in quiz_questions:
+            qid = question_id(q)
+            if qid not in questions or question_quality(q) > question_quality(questions[qid]):
+                questions[qid] = q
+            if qid not in ids:
+                ids.append(qid)
+        quizzes[quiz_name] = ids
+
+    if dedup == 'near':
+        all_ids = list(questions)
+        alias = {}
+        for members in find_duplicate_clusters([questions[qid] for qid in all_ids], similarity):
+            best = max(members, key=lambda idx: question_quality(questions[all_ids[idx]]))
+            for idx in members:
+                if idx != best:
+                    alias[all_ids[idx]] = all_ids[best]
+        for qid in alias:
+            del questions[qid]
+        for quiz_name, ids in quizzes.items():
+            quizzes[quiz_name] = list(dict.fromkeys(alias.get(qid, qid) for qid in ids))
+
+    return {
+        'version': DATABASE_FORMAT_VERSION,
+        'questions': questions,
+        'quizzes': quizzes
+    }
+
+def build_quiz_membership(database: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Return the global index mapping each question ID to the quizzes containing it"""
+    membership = defaultdict(list)
+    for quiz_name, ids in database['quizzes'].items():
+        for qid in ids:
+            membership[qid].append(quiz_name)
+    return dict(membership)
+
+def expand_indexed_database(database: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """Convert an indexed database back to the per-quiz question lists layout"""
+    if 'quizzes' not in database:
+        return database
+    questions = database['questions']
+    return {quiz_name: [questions[qid] for qid in ids] for quiz_name, ids in database['quizzes'].items()}
@@ -0,0 +1,130 @@
+import sys
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator
+from question_index import build_indexed_database, DATABASE_FORMAT_VERSION
+
+# Keys of an extracted question, in the order the extractor writes them
+QUESTION_KEYS = ('question', 'type', 'options', 'correctAnswers')
+
+class Question:
+    __slots__ = ('text', 'type', 'option_texts', 'correct_mask', 'answers', 'extra')
+
+    def __init__(self, text: str, qtype: str, option_texts: Tuple[str, ...] = (), correct_mask: int = 0,
+                 answers: Optional[Tuple[str, ...]] = None, extra: Optional[Dict[str, Any]] = None):
+        """Compact, immutable-by-convention form of one extracted question
+
+        Strings are interned, so option texts, types and 'True'/'False' shared
+        by many questions are stored once. Correct options are a bitmask over
+        option_texts (bit i set when option i is correct) instead of repeating
+        their text in correctAnswers; answers only holds correctAnswers when
+        they differ from the options marked correct (feedback that matched no
+        option). Keys outside the extractor's schema, such as 'id', are kept
+        in extra, so to_dict() reproduces the original dict exactly.
+        """
+        self.text = sys.intern(text)
+        self.type = sys.intern(qtype)
+        self.option_texts = tuple(sys.intern(option) for option in option_texts)
+        self.correct_mask = correct_mask
+        self.answers = tuple(sys.intern(answer) for answer in answers) if answers is not None else None
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, q: Dict[str, Any]) -> 'Question':
+        options = q['options']
+        option_texts = [option['text'] for option in options]
+        correct_mask = 0
+        for idx, option in enumerate(options):
+            if option['isCorrect']:
+                correct_mask |= 1 << idx
+        answers = q['correctAnswers']
+        derived = [text for idx, text in enumerate(option_texts) if correct_mask >> idx & 1]
+        extra = {key: value for key, value in q.items() if key not in QUESTION_KEYS}
+        return cls(q['question'], q['type'], option_texts, correct_mask,
+                   None if answers == derived else answers, extra)
+
+    def is_correct(self, idx: int) -> bool:
+        return bool(self.correct_mask >> idx & 1)
+
+    @property
+    def correct_answers(self) -> Tuple[str, ...]:
+        if self.answers is not None:
+            return self.answers
+        return tuple(text for idx, text in enumerate(self.option_texts) if self.correct_mask >> idx & 1)
+
+    @property
+    def options(self) -> List[Dict[str, Any]]:
+        return [{'text': text, 'isCorrect': self.is_correct(idx)} for idx, text in enumerate(self.option_texts)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the question in the extractor's JSON schema"""
+        q = {
+            'question': self.text,
+            'type': self.type,
+            'options': self.options,
+            'correctAnswers': list(self.correct_answers)
+        }
+        if self.extra:
+            q.update(self.extra)
+        return q
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Question) and all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"Question({self.text[:40]!r}, {self.type!r}, {len(self.option_texts)} options)"
+
+def compact_questions(questions: Iterable[Dict[str, Any]]) -> Tuple[Question, ...]:
+    """Convert a list of question dicts to Question objects"""
+    return tuple(Question.from_dict(q) for q in questions)
+
+def expand_questions(questions: Iterable[Question]) -> List[Dict[str, Any]]:
+    """Convert Question objects back to fresh question dicts"""
+    return [q.to_dict() for q in questions]
+
+class QuestionBank:
+    __slots__ = ('version', 'questions', 'quizzes')
+
+    def __init__(self, questions: Dict[str, Question], quizzes: Dict[str, Tuple[str, ...]],
+                 version: int = DATABASE_FORMAT_VERSION):
+        """Compact in-memory form of an indexed database
+
+        Question IDs are interned, so the ID keys of 'questions' and every
+        quiz's ID tuple share one string per question.
+        """
+        self.version = version
+        self.questions = questions
+        self.quizzes = quizzes
+
+    @classmethod
+    def from_database(cls, database: Dict[str, Any]) -> 'QuestionBank':
+        """Build the bank from an indexed database (a legacy one is indexed first)"""
+        if 'quizzes' not in database:
+            database = build_indexed_database(database)
+        questions = {sys.intern(qid): Question.from_dict(q) for qid, q in database['questions'].items()}
+        quizzes = {quiz_name: tuple(sys.intern(qid) for qid in ids) for quiz_name, ids in database['quizzes'].items()}
+        return cls(questions, quizzes, database.get('version', DATABASE_FORMAT_VERSION))
+
+    def to_database(self) -> Dict[str, Any]:
+        """Return the bank in the indexed JSON layout"""
+        return {
+            'version': self.version,
+            'questions': {qid: q.to_dict() for qid, q in self.questions.items()},
+            'quizzes': {quiz_name: list(ids) for quiz_name, ids in self.quizzes.items()}
+        }
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def __contains__(self, qid: str) -> bool:
+        return qid in self.questions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.questions)
+
+    def question(self, qid: str) -> Dict[str, Any]:
+        """Return one question as a fresh dict in the JSON schema"""
+        return self.questions[qid].to_dict()
+
+    def questions_of(self, ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Return {id: question dict} for the given IDs, skipping unknown ones"""
+        questions = self.questions
+        return {qid: questions[qid].to_dict() for qid in ids if qid in questions}
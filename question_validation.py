@@ -0,0 +1,183 @@
+import json
+import argparse
+from collections import Counter
+from typing import List, Dict, Any, Optional, Set, Iterable
+from answer_matching import question_answer_index
+from question_index import build_indexed_database, build_quiz_membership
+from sharded_output import load_database, write_atomic
+
+# Version of the report layout written by ValidationReport.write
+VALIDATION_REPORT_VERSION = 1
+
+VALIDATION_REPORT_FILE = 'validation_report.json'
+
+# Errors make a question invalid (it is left out of random quizzes); warnings are only reported
+RULE_SEVERITY = {
+    'missing_answers': 'error',
+    'missing_options': 'error',
+    'answer_option_mismatch': 'warning',
+    'duplicate_options': 'warning',
+}
+
+CHOICE_TYPES = ('single', 'multiple')
+
+class ValidationColumns:
+    __slots__ = ('ids', 'texts', 'types', 'option_texts', 'answers', 'checked', '_questions', '_answer_indexes')
+
+    def __init__(self, questions: Dict[str, Dict[str, Any]]):
+        """Column-wise view of a question bank, extracted once and shared by every rule
+
+        Essay questions are not validated and are left out of 'checked'.
+        """
+        self.ids = list(questions)
+        self.texts = [q.get('question', '') for q in questions.values()]
+        self.types = [q.get('type') for q in questions.values()]
+        self.option_texts = [[opt['text'] for opt in q.get('options', [])] for q in questions.values()]
+        self.answers = [q.get('correctAnswers') or [] for q in questions.values()]
+        self.checked = [row for row, qtype in enumerate(self.types) if qtype != 'essay']
+        self._questions = questions
+        self._answer_indexes = None
+
+    @property
+    def answer_indexes(self) -> list:
+        """Normalized option keys per question, built on first use by the option rules
+
+        They come from the memoized answer indexes, so the rules see exactly
+        the forms the extractor matched feedback against.
+        """
+        if self._answer_indexes is None:
+            self._answer_indexes = [question_answer_index(q) for q in self._questions.values()]
+        return self._answer_indexes
+
+# Each rule maps the columns to {row: detail} for the questions breaking it
+
+def _missing_answers(columns: ValidationColumns) -> Dict[int, Any]:
+    return {row: True for row in columns.checked if not columns.answers[row]}
+
+def _missing_options(columns: ValidationColumns) -> Dict[int, Any]:
+    return {row: True for row in columns.checked
+            if columns.types[row] in CHOICE_TYPES and not columns.option_texts[row]}
+
+def _answer_option_mismatch(columns: ValidationColumns) -> Dict[int, Any]:
+    """Correct answers matching no option under the extractor's own matching rules"""
+    mismatches = {}
+    for row in columns.checked:
+        if columns.option_texts[row] and columns.answers[row]:
+            unmatched = columns.answer_indexes[row].unmatched_answers(columns.answers[row])
+            if unmatched:
+                mismatches[row] = unmatched
+    return mismatches
+
+def _duplicate_options(columns: ValidationColumns) -> Dict[int, Any]:
+    duplicates = {}
+    for row in columns.checked:
+        keys = columns.answer_indexes[row].keys
+        if len(set(keys)) < len(keys):
+            counts = Counter(keys)
+            duplicates[row] = [text for text, key in zip(columns.option_texts[row], keys) if counts[key] > 1]
+    return duplicates
+
+RULES = {
+    'missing_answers': _missing_answers,
+    'missing_options': _missing_options,
+    'answer_option_mismatch': _answer_option_mismatch,
+    'duplicate_options': _duplicate_options,
+}
+
+class ValidationReport:
+    def __init__(self, columns: ValidationColumns, findings: Dict[str, Dict[int, Any]],
+                 membership: Dict[str, List[str]]):
+        """Rule findings over a question bank, keyed by question ID"""
+        self.question_count = len(columns.ids)
+        self.rule_counts = {rule: len(rows) for rule, rows in findings.items()}
+        self.issues = {}
+        for rule, rows in findings.items():
+            for row, detail in rows.items():
+                entry = self.issues.setdefault(columns.ids[row], {
+                    'id': columns.ids[row],
+                    'quizzes': membership.get(columns.ids[row], []),
+                    'question': columns.texts[row],
+                    'rules': {}
+                })
+                entry['rules'][rule] = detail
+        self.invalid_ids = {qid for qid, entry in self.issues.items()
+                            if any(RULE_SEVERITY[rule] == 'error' for rule in entry['rules'])}
+
+    @property
+    def warning_count(self) -> int:
+        return len(self.issues) - len(self.invalid_ids)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': VALIDATION_REPORT_VERSION,
+            'summary': {
+                'questions': self.question_count,
+                'invalid': len(self.invalid_ids),
+                'warningsOnly': self.warning_count,
+                'rules': self.rule_counts,
+                'severity': RULE_SEVERITY
+            },
+            'issues': sorted(self.issues.values(), key=lambda entry: (entry['quizzes'][:1], entry['id']))
+        }
+
+    def write(self, path: str):
+        """Write the report as JSON atomically"""
+        write_atomic(path, json.dumps(self.to_dict(), ensure_ascii=False, indent=2).encode('utf-8'))
+
+    def issue_lines(self) -> List[str]:
+        """One console line per finding, errors first"""
+        lines = []
+        for severity, icon in (('error', '❌'), ('warning', '⚠️ ')):
+            for entry in self.issues.values():
+                for rule, detail in entry['rules'].items():
+                    if RULE_SEVERITY[rule] != severity:
+                        continue
+                    suffix = f": {', '.join(repr(text[:30]) for text in detail)}" if isinstance(detail, list) else ''
+                    lines.append(f"{icon} {entry['id']} '{entry['question'][:40]}...' {rule.replace('_', ' ')}{suffix}")
+        return lines
+
+    def print_summary(self, limit: int = 10):
+        print(f"\n📋 VALIDATED {self.question_count} unique questions: "
+              f"{len(self.invalid_ids)} invalid, {self.warning_count} with warnings only")
+        lines = self.issue_lines()
+        for line in lines[:limit]:
+            print(f"    {line}")
+        if len(lines) > limit:
+            print(f"    ... and {len(lines) - limit} more issues")
+
+def validate_questions(questions: Dict[str, Dict[str, Any]], membership: Optional[Dict[str, List[str]]] = None,
+                       rules: Optional[Iterable[str]] = None) -> ValidationReport:
+    """Run the validation rules over {question ID: question} in one batch"""
+    columns = ValidationColumns(questions)
+    findings = {rule: RULES[rule](columns) for rule in (rules or RULES)}
+    return ValidationReport(columns, findings, membership or {})
+
+def validate_database(database: Dict[str, Any], rules: Optional[Iterable[str]] = None) -> ValidationReport:
+    """Validate every unique question of an indexed (or legacy) database once"""
+    if 'quizzes' not in database:
+        database = build_indexed_database(database)
+    return validate_questions(database['questions'], build_quiz_membership(database), rules)
+
+def invalid_question_ids(database: Dict[str, Any]) -> Set[str]:
+    """IDs of the questions breaking an error-severity rule"""
+    errors = [rule for rule, severity in RULE_SEVERITY.items() if severity == 'error']
+    return validate_database(database, errors).invalid_ids
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Validate a published question bank and write a JSON report')
+    parser.add_argument('--database', default='quiz_database.json',
+                        help='indexed or legacy database, or a quiz_db/manifest.json (default: quiz_database.json)')
+    parser.add_argument('--report', default=VALIDATION_REPORT_FILE,
+                        help=f"report file to write ('-' for stdout, default: {VALIDATION_REPORT_FILE})")
+    args = parser.parse_args(argv)
+
+    report = validate_database(load_database(args.database))
+    if args.report == '-':
+        print(json.dumps(report.to_dict(), ensure_ascii=False, indent=2))
+        return
+    report.write(args.report)
+    report.print_summary()
+    print(f"📄 Report saved to: {args.report}")
+
+if __name__ == '__main__':
+    main()
@@ -1,142 +1,392 @@
+import io
 import os
 import json
 import re
-from bs4 import BeautifulSoup
-from typing import List, Dict, Any, Set, Optional
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+import lxml.html
+from lxml import etree
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+from typing import List, Dict, Any, Set, Optional, Tuple, Iterable, Iterator
 from collections import defaultdict
+from extraction_cache import ExtractionCache
+from text_normalizer import normalize_text, strip_option_prefix
+from answer_matching import get_answer_index
+from near_duplicates import remove_near_duplicate_questions, DEFAULT_SIMILARITY
+from question_index import question_key, build_indexed_database
+from sharded_output import write_sharded_database, write_atomic, COMPRESSIONS, MANIFEST_FILE
+from search_index import write_search_index, SEARCH_INDEX_FILE
+from question_validation import ValidationReport, validate_database, VALIDATION_REPORT_FILE
+from question_binary import write_binary_database, BINARY_DATABASE_FILE
+from instrumentation import ExtractionMetrics, METRICS_FORMATS, configure_logging, logger
+
+# Bump whenever a change alters extracted output, so cached results are re-extracted
+EXTRACTOR_VERSION = '5'
+
+# Parser backends: two BeautifulSoup tree builders, plus a direct lxml.html engine
+# that locates question containers with XPath and only builds soup for those
+PARSER_BACKENDS = ('html.parser', 'lxml', 'lxml-xpath')
+
+QUESTION_ID_PATTERN = re.compile(r'^question-\d+')
+
+# Moodle question container state classes after grading, and the response outcome each means
+QUESTION_OUTCOMES = (('correct', 'correct'), ('partiallycorrect', 'partial'), ('incorrect', 'incorrect'),
+                     ('notanswered', 'unanswered'), ('gaveup', 'unanswered'))
+
+EXSLT_REGEX_NS = 'http://exslt.org/regular-expressions'
+
+QUESTION_XPATH = (
+    "//div[re:test(@id, '^question-\\d+')]",
+    "//div[contains(@class, 'que')]",
+)
+
+def _is_question_container(name: str, attrs) -> bool:
+    """SoupStrainer predicate: keep only divs that can be question containers"""
+    if name != 'div':
+        return False
+    if QUESTION_ID_PATTERN.match(attrs.get('id') or ''):
+        return True
+    classes = attrs.get('class') or ''
+    if isinstance(classes, str):
+        classes = classes.split()
+    return any('que' in cls for cls in classes)
+
+QUESTION_STRAINER = SoupStrainer(_is_question_container)
+
+class QuestionRecord:
+    """A question container plus the nodes extraction reads from it, located in one tree walk"""
+    __slots__ = ('div', 'matches_id', 'matches_class', 'qtext', 'answer', 'feedback', 'rightanswer', 'option_entries')
+
+    def __init__(self, div, matches_id: bool, matches_class: bool):
+        self.div = div
+        self.matches_id = matches_id
+        self.matches_class = matches_class
+        # First div.qtext / div.answer / div.feedback inside the container, and the
+        # first div.rightanswer inside that feedback div, as find() would return them
+        self.qtext = None
+        self.answer = None
+        self.feedback = None
+        self.rightanswer = None
+        # (option text, container) pairs, filled by QuizExtractor._option_entries on first use
+        self.option_entries = None
+
+def scan_question_containers(root) -> List[QuestionRecord]:
+    """Walk a soup once and return a record for every question container and its nodes, in document order"""
+    records = []
+    open_records = []
+    ancestors = []
+    for element in root.descendants:
+        if not isinstance(element, Tag):
+            continue
+        parent = element.parent
+        while ancestors and ancestors[-1] is not parent:
+            closed = ancestors.pop()
+            if open_records and open_records[-1].div is closed:
+                open_records.pop()
+        ancestors.append(element)
+        if element.name != 'div':
+            continue
+
+        classes = element.get('class') or ()
+        if open_records and classes:
+            if 'qtext' in classes:
+                for record in open_records:
+                    if record.qtext is None:
+                        record.qtext = element
+            if 'answer' in classes:
+                for record in open_records:
+                    if record.answer is None:
+                        record.answer = element
+            if 'feedback' in classes:
+                for record in open_records:
+                    if record.feedback is None:
+                        record.feedback = element
+            if 'rightanswer' in classes:
+                for record in open_records:
+                    if (record.rightanswer is None and record.feedback is not None
+                            and any(node is record.feedback for node in ancestors)):
+                        record.rightanswer = element
+
+        matches_id = bool(QUESTION_ID_PATTERN.match(element.get('id') or ''))
+        matches_class = any('que' in cls for cls in classes)
+        if matches_id or matches_class:
+            record = QuestionRecord(element, matches_id, matches_class)
+            records.append(record)
+            open_records.append(record)
+    return records
+
+STREAM_CHUNK_SIZE = 1 << 16
+
+# Rightanswer feedback parsing
+QUOTED_ANSWER_PATTERN = re.compile(r'"([^"]+)"')
+ANSWER_SEPARATOR_PATTERN = re.compile(r'[,،;]|\bvà\b')
+BARE_LABEL_PATTERN = re.compile(r'^[a-d]\.?\s*$')
+FEEDBACK_FILTER_WORDS = frozenset(['are', 'is', 'the', 'correct', 'answer', 'answers', 'đáp án', 'chính xác', 'là', 'a', 'an'])
+
+class _QuestionContainerScanner(HTMLParser):
+    """Incremental tokenizer that cuts the raw markup of each outermost question container out of a page"""
+    def __init__(self, name: str = ''):
+        super().__init__(convert_charrefs=False)
+        self.name = name
+        self._buffer = None
+        self._depth = 0
+        self._containers = []
+    
+    def close(self):
+        """Finish the page, keeping a container left open by a truncated page as tree parsing would"""
+        super().close()
+        if self._buffer is not None:
+            logger.warning("%s ends inside an unclosed question container; extracting it as far as it goes", self.name)
+            self._containers.append(''.join(self._buffer))
+            self._buffer = None
+            self._depth = 0
+    
+    def pop_containers(self) -> List[str]:
+        """Return and forget the containers completed so far"""
+        containers, self._containers = self._containers, []
+        return containers
+    
+    def handle_starttag(self, tag, attrs):
+        if self._buffer is None:
+            if not _is_question_container(tag, dict(attrs)):
+                return
+            self._buffer = []
+        self._buffer.append(self.get_starttag_text())
+        if tag == 'div':
+            self._depth += 1
+    
+    def handle_startendtag(self, tag, attrs):
+        if self._buffer is not None:
+            self._buffer.append(self.get_starttag_text())
+    
+    def handle_endtag(self, tag):
+        if self._buffer is None:
+            return
+        self._buffer.append(f'</{tag}>')
+        if tag == 'div':
+            self._depth -= 1
+            if self._depth == 0:
+                self._containers.append(''.join(self._buffer))
+                self._buffer = None
+    
+    def handle_data(self, data):
+        if self._buffer is not None:
+            self._buffer.append(data)
+    
+    def handle_entityref(self, name):
+        if self._buffer is not None:
+            self._buffer.append(f'&{name};')
+    
+    def handle_charref(self, name):
+        if self._buffer is not None:
+            self._buffer.append(f'&#{name};')
+    
+    def handle_comment(self, data):
+        if self._buffer is not None:
+            self._buffer.append(f'<!--{data}-->')
 
 class QuizExtractor:
-    def __init__(self, html_file: str):
-        """Initialize the quiz extractor with an HTML file path"""
+    def __init__(self, html_file: str, parser: str = 'lxml', strain: bool = True, stream: bool = False,
+                 metrics: Optional[ExtractionMetrics] = None, content: Optional[str] = None):
+        """Initialize the quiz extractor with an HTML file path (or its content, named by html_file)"""
+        if parser not in PARSER_BACKENDS:
+            raise ValueError(f"Unknown parser backend '{parser}', expected one of {PARSER_BACKENDS}")
         self.html_file = html_file
-        with open(html_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        self.soup = BeautifulSoup(content, 'html.parser')
+        self.content = content
+        self.parser = parser
+        self.stream = stream
+        self.metrics = metrics if metrics is not None else ExtractionMetrics()
+        self.debug = logger.isEnabledFor(logging.DEBUG)
         self.debug_logs = []
+        self.soup = None
+        self.tree = None
+        self.metrics.count('files')
+        if stream:
+            return
+        with self.metrics.phase('parse'):
+            if content is None:
+                with open(html_file, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            if parser == 'lxml-xpath':
+                self.tree = lxml.html.document_fromstring(content)
+            else:
+                self.soup = BeautifulSoup(content, parser, parse_only=QUESTION_STRAINER if strain else None)
         
-    def log_debug(self, message: str):
-        """Add debug message to logs"""
+    def _open_page(self):
+        """Open the page for incremental reading"""
+        if self.content is not None:
+            return io.StringIO(self.content)
+        return open(self.html_file, 'r', encoding='utf-8')
+    
+    def log_debug(self, message: str, *args):
+        """Add debug message to logs; formatting is deferred and skipped entirely unless debug is enabled"""
+        if not self.debug:
+            return
+        if args:
+            message = message % args
         self.debug_logs.append(message)
-        print(f"  🔍 {message}")
+        logger.debug(message)
         
     def clean_text(self, text: str) -> str:
         """Clean and normalize text content"""
-        if not text:
-            return ""
-        
-        # Remove extra whitespace and newlines
-        text = re.sub(r'\s+', ' ', text.strip())
-        
-        # Fix common HTML parsing issues
-        text = re.sub(r'<[^>]*>', '', text)  # Remove any remaining HTML tags
-        text = re.sub(r'/p>', '', text)  # Fix broken </p> tags
-        text = re.sub(r'&nbsp;', ' ', text)  # Replace &nbsp; with space
-        text = re.sub(r'&amp;', '&', text)  # Fix HTML entities
-        text = re.sub(r'&lt;', '<', text)
-        text = re.sub(r'&gt;', '>', text)
-        text = re.sub(r'&quot;', '"', text)
-        
-        return text.strip()
+        return normalize_text(text)
             
     def extract_questions(self) -> List[Dict[str, Any]]:
         """Extract all questions from the quiz HTML file"""
-        questions = []
-        warnings = []
-        
-        self.log_debug(f"Starting extraction from: {os.path.basename(self.html_file)}")
-        
-        # Find all question divs using multiple patterns
-        question_divs = []
-        
-        # Pattern 1: Look for divs with id starting with 'question-'
-        q_divs_1 = self.soup.find_all('div', {'id': re.compile(r'^question-\d+')})
-        question_divs.extend(q_divs_1)
-        
-        # Pattern 2: Look for divs with class containing 'que'
-        q_divs_2 = self.soup.find_all('div', class_=lambda x: x and any('que' in cls for cls in x))
-        question_divs.extend(q_divs_2)
+        return list(self.iter_questions())
+    
+    def iter_questions(self) -> Iterator[Dict[str, Any]]:
+        """Yield the questions of the quiz HTML file one at a time, unvalidated (see question_validation)"""
+        for _, question_data in self._iter_extracted():
+            yield question_data
+    
+    def iter_responses(self) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Yield (question, response) pairs, the response being what this attempt page shows was answered"""
+        for record, question_data in self._iter_extracted():
+            yield question_data, self._extract_response(record, question_data)
+    
+    def _iter_extracted(self) -> Iterator[Tuple[QuestionRecord, Dict[str, Any]]]:
+        """Yield each extracted question with the container record it came from"""
+        metrics = self.metrics
         
-        # Remove duplicates while preserving order
-        seen_ids = set()
-        unique_question_divs = []
-        for div in question_divs:
-            div_id = div.get('id', '')
-            if div_id and div_id not in seen_ids:
-                seen_ids.add(div_id)
-                unique_question_divs.append(div)
-            elif not div_id:  # Handle divs without ids but with question content
-                # Check if this div contains question content
-                if div.find('div', class_='qtext'):
-                    unique_question_divs.append(div)
+        self.log_debug("Starting extraction from: %s", os.path.basename(self.html_file))
         
-        question_divs = unique_question_divs
-        self.log_debug(f"Found {len(question_divs)} question containers")
+        if self.stream:
+            question_records = self._stream_question_records()
+            total = ''
+        else:
+            with metrics.phase('discovery'):
+                question_records = list(self._unique_question_records(self._find_question_records(), set()))
+            metrics.count('containers', len(question_records))
+            self.log_debug("Found %d question containers", len(question_records))
+            total = f"/{len(question_records)}"
         
-        for i, div in enumerate(question_divs, 1):
+        for i, record in enumerate(question_records, 1):
             try:
-                self.log_debug(f"Processing question {i}/{len(question_divs)}")
-                question_data = self._extract_question(div, i)
+                self.log_debug("Processing question %d%s", i, total)
+                question_data = self._extract_question(record, i)
                 if question_data:
-                    # Validate that question has at least one correct answer (skip essay questions)
-                    if question_data.get('type') != 'essay':
-                        if not question_data.get('correctAnswers') or len(question_data['correctAnswers']) == 0:
-                            warning = f"❌ Question {i}: '{question_data.get('question', 'Unknown')[:50]}...' has NO correct answers!"
-                            warnings.append(warning)
-                            self.log_debug(warning)
-                        else:
-                            self.log_debug(f"✅ Question {i}: Found {len(question_data['correctAnswers'])} correct answer(s)")
-                    else:
-                        self.log_debug(f"📝 Question {i}: Essay question - skipping answer validation")
-                    
-                    questions.append(question_data)
+                    metrics.count('questions')
+                    self.log_debug("✅ Question %d: Found %d correct answer(s)", i, len(question_data.get('correctAnswers', [])))
+                    yield record, question_data
                 else:
-                    self.log_debug(f"⚠️ Question {i}: Could not extract question data")
+                    metrics.count('questions_skipped')
+                    self.log_debug("⚠️ Question %d: Could not extract question data", i)
             except Exception as e:
-                error_msg = f"❌ Error extracting question {i}: {e}"
-                self.log_debug(error_msg)
+                metrics.count('question_errors')
+                self.log_debug("❌ Error extracting question %d: %s", i, e)
                 continue
+    
+    def _unique_question_records(self, records: Iterable[QuestionRecord], seen_ids: Set[str]) -> Iterator[QuestionRecord]:
+        """Remove duplicates while preserving order"""
+        for record in records:
+            div_id = record.div.get('id', '')
+            if div_id and div_id not in seen_ids:
+                seen_ids.add(div_id)
+                yield record
+            elif not div_id:  # Handle divs without ids but with question content
+                # Check if this div contains question content
+                if record.qtext is not None:
+                    yield record
+    
+    def _find_question_records(self) -> List[QuestionRecord]:
+        """Find all candidate question containers using multiple patterns"""
+        if self.soup is None:
+            return self._find_question_records_xpath()
+        return self._match_question_records(self.soup)
+    
+    @staticmethod
+    def _match_question_records(soup) -> List[QuestionRecord]:
+        """Apply both container patterns to a soup in a single walk"""
+        records = scan_question_containers(soup)
         
-        if warnings:
-            print(f"\n🚨 VALIDATION WARNINGS ({len(warnings)} issues found):")
-            for warning in warnings:
-                print(warning)
-        else:
-            print(f"✅ All questions validated successfully!")
+        # Pattern 1 (id starting with 'question-') matches come before pattern 2 (class containing 'que')
+        question_records = [record for record in records if record.matches_id]
+        question_records.extend(record for record in records if record.matches_class)
         
-        return questions
+        return question_records
+    
+    def _find_question_records_xpath(self) -> List[QuestionRecord]:
+        """Locate containers with XPath over the lxml tree and build a small soup and record for each one"""
+        question_records = []
+        records = {}
+        for xpath in QUESTION_XPATH:
+            for element in self.tree.xpath(xpath, namespaces={'re': EXSLT_REGEX_NS}):
+                # An element matched by both patterns must map to the same record so dedup still works
+                if element not in records:
+                    container = self._fragment_soup(element).find('div')
+                    records[element] = next(record for record in scan_question_containers(container.parent)
+                                            if record.div is container)
+                question_records.append(records[element])
+        return question_records
+    
+    def _fragment_soup(self, fragment):
+        """Build a BeautifulSoup document from a container's markup or lxml element"""
+        if not isinstance(fragment, str):
+            fragment = etree.tostring(fragment, method='html', encoding='unicode', with_tail=False)
+        fragment_parser = 'lxml' if self.parser == 'lxml-xpath' else self.parser
+        return BeautifulSoup(fragment, fragment_parser)
+    
+    def _stream_question_records(self) -> Iterator[QuestionRecord]:
+        """Incrementally read the file and yield question records as their containers close"""
+        seen_ids = set()
+        scanner = _QuestionContainerScanner(self.html_file)
+        with self._open_page() as f:
+            for chunk in iter(lambda: f.read(STREAM_CHUNK_SIZE), ''):
+                with self.metrics.phase('parse'):
+                    scanner.feed(chunk)
+                for fragment in scanner.pop_containers():
+                    yield from self._fragment_question_records(fragment, seen_ids)
+        with self.metrics.phase('parse'):
+            scanner.close()
+        for fragment in scanner.pop_containers():
+            yield from self._fragment_question_records(fragment, seen_ids)
+    
+    def _fragment_question_records(self, fragment: str, seen_ids: Set[str]) -> List[QuestionRecord]:
+        """Apply both container patterns to one streamed container"""
+        with self.metrics.phase('discovery'):
+            records = list(self._unique_question_records(self._match_question_records(self._fragment_soup(fragment)), seen_ids))
+        self.metrics.count('containers', len(records))
+        return records
     
-    def _extract_question(self, div, question_num: int) -> Optional[Dict[str, Any]]:
-        """Extract a single question's data from a div element"""
+    def _extract_question(self, record: QuestionRecord, question_num: int) -> Optional[Dict[str, Any]]:
+        """Extract a single question's data from its container record"""
         
         # Get question text
-        qtext_div = div.find('div', class_='qtext')
+        qtext_div = record.qtext
         if not qtext_div:
-            self.log_debug(f"No qtext found in question {question_num}")
+            self.log_debug("No qtext found in question %d", question_num)
             return None
             
         question_text = self.clean_text(qtext_div.get_text())
-        self.log_debug(f"Question text: {question_text[:60]}...")
+        self.log_debug("Question text: %.60s...", question_text)
         
         # Determine question type from div classes and content
-        question_type = self._determine_question_type(div)
-        self.log_debug(f"Question type: {question_type}")
+        with self.metrics.phase('type_detection'):
+            question_type = self._determine_question_type(record)
+        self.log_debug("Question type: %s", question_type)
         
         # Extract correct answers from rightanswer section FIRST (most reliable)
-        correct_answers_from_feedback = self._extract_correct_answers_from_feedback(div)
-        self.log_debug(f"Answers from feedback: {correct_answers_from_feedback}")
+        with self.metrics.phase('feedback'):
+            correct_answers_from_feedback = self._extract_correct_answers_from_feedback(record)
+        self.log_debug("Answers from feedback: %s", correct_answers_from_feedback)
         
         # Get options and correct answers based on question type
-        if question_type == 'truefalse':
-            options, correct_answers = self._extract_truefalse_data(div, correct_answers_from_feedback)
-        elif question_type == 'essay':
-            options, correct_answers = [], []  # Essays don't have predefined options/answers
-        elif question_type in ['multiple', 'single']:
-            options, correct_answers = self._extract_choice_data(div, question_type, correct_answers_from_feedback)
-        else:
-            options, correct_answers = self._extract_choice_data(div, 'single', correct_answers_from_feedback)
+        with self.metrics.phase('matching'):
+            if question_type == 'truefalse':
+                options, correct_answers = self._extract_truefalse_data(record, correct_answers_from_feedback)
+            elif question_type == 'essay':
+                options, correct_answers = [], []  # Essays don't have predefined options/answers
+            elif question_type in ['multiple', 'single']:
+                options, correct_answers = self._extract_choice_data(record, question_type, correct_answers_from_feedback)
+            else:
+                options, correct_answers = self._extract_choice_data(record, 'single', correct_answers_from_feedback)
+        self.metrics.count('options', len(options))
         
-        self.log_debug(f"Final correct answers: {correct_answers}")
-        self.log_debug(f"Options count: {len(options)}")
+        self.log_debug("Final correct answers: %s", correct_answers)
+        self.log_debug("Options count: %d", len(options))
         
         return {
             'question': question_text,
@@ -145,9 +395,9 @@ class QuizExtractor:
             'correctAnswers': correct_answers
         }
     
-    def _determine_question_type(self, div) -> str:
+    def _determine_question_type(self, record: QuestionRecord) -> str:
         """Determine the type of question based on div classes and content"""
-        div_classes = ' '.join(div.get('class', []))
+        div_classes = ' '.join(record.div.get('class', []))
         
         # Check for essay type
         if 'essay' in div_classes:
@@ -160,7 +410,7 @@ class QuizExtractor:
         # Check for multichoice type and determine if single or multiple
         if 'multichoice' in div_classes:
             # Look for input types in answer div
-            answer_div = div.find('div', class_='answer')
+            answer_div = record.answer
             if answer_div:
                 # Count checkboxes vs radio buttons
                 checkboxes = answer_div.find_all('input', type='checkbox')
@@ -177,7 +427,7 @@ class QuizExtractor:
         
         return 'single'  # default
     
-    def _extract_truefalse_data(self, div, correct_answers_from_feedback: List[str]) -> tuple:
+    def _extract_truefalse_data(self, record: QuestionRecord, correct_answers_from_feedback: List[str]) -> tuple:
         """Extract data for true/false questions"""
         options = [
             {'text': 'True', 'isCorrect': False},
@@ -199,7 +449,7 @@ class QuizExtractor:
         
         # Fallback: check student answers if no feedback
         if not correct_answers:
-            answer_div = div.find('div', class_='answer')
+            answer_div = record.answer
             if answer_div:
                 correct_containers = answer_div.find_all('div', class_=lambda x: x and 'correct' in x)
                 
@@ -216,19 +466,51 @@ class QuizExtractor:
         
         return options, correct_answers
     
-    def _extract_choice_data(self, div, question_type: str, correct_answers_from_feedback: List[str]) -> tuple:
+    def _extract_choice_data(self, record: QuestionRecord, question_type: str, correct_answers_from_feedback: List[str]) -> tuple:
         """Extract data for multiple choice and single choice questions"""
         options = []
         
-        answer_div = div.find('div', class_='answer')
-        if not answer_div:
+        if not record.answer:
             return options, correct_answers_from_feedback
+        option_entries = self._option_entries(record)
+        
+        # Match every feedback answer against the options once, through the shared index
+        answer_index = get_answer_index(tuple(text for text, _ in option_entries))
+        matched = answer_index.match_all(correct_answers_from_feedback)
+        self.metrics.count('matched_options', len(matched))
+        
+        for idx, (option_text, container) in enumerate(option_entries):
+            options.append({
+                'text': option_text,
+                'isCorrect': self._is_option_correct(idx in matched, container)
+            })
+        
+        # Create final correct answers list
+        correct_answers = []
+        for option in options:
+            if option['isCorrect']:
+                correct_answers.append(option['text'])
+        
+        # If we couldn't match feedback to options, use feedback directly
+        if not correct_answers and correct_answers_from_feedback:
+            correct_answers = correct_answers_from_feedback
+            self.metrics.count('unmatched_feedback')
+            self.log_debug("Using feedback answers directly: %s", correct_answers)
+        
+        return options, correct_answers
+    
+    def _option_entries(self, record: QuestionRecord) -> List[Tuple[str, Any]]:
+        """Return (option text, container) for each choice option of a question, in page order"""
+        if record.option_entries is not None:
+            return record.option_entries
+        answer_div = record.answer
         
         # Find all option containers - look for both 'r0' and 'r1' patterns
         option_containers = answer_div.find_all('div', class_=re.compile(r'^r[01](\s|$)'))
         
-        self.log_debug(f"Found {len(option_containers)} option containers")
+        self.log_debug("Found %d option containers", len(option_containers))
         
+        option_entries = []
         for idx, container in enumerate(option_containers):
             # Get option text from the flex-fill div
             text_div = container.find('div', class_='flex-fill')
@@ -241,44 +523,26 @@ class QuizExtractor:
                         break
             
             if not text_div:
-                self.log_debug(f"No text found for option {idx}")
+                self.log_debug("No text found for option %d", idx)
                 continue
                 
             option_text = self.clean_text(text_div.get_text())
             
             # Remove option prefixes (a., b., c., d.)
-            option_text = re.sub(r'^[a-z]\.\s*', '', option_text, flags=re.IGNORECASE)
-            
-            self.log_debug(f"Option {idx}: {option_text[:40]}...")
-            
-            # Check if this option is correct based on feedback
-            is_correct = self._is_option_correct(option_text, correct_answers_from_feedback, container)
+            option_text = strip_option_prefix(option_text)
             
-            options.append({
-                'text': option_text,
-                'isCorrect': is_correct
-            })
+            self.log_debug("Option %d: %.40s...", idx, option_text)
+            option_entries.append((option_text, container))
         
-        # Create final correct answers list
-        correct_answers = []
-        for option in options:
-            if option['isCorrect']:
-                correct_answers.append(option['text'])
-        
-        # If we couldn't match feedback to options, use feedback directly
-        if not correct_answers and correct_answers_from_feedback:
-            correct_answers = correct_answers_from_feedback
-            self.log_debug(f"Using feedback answers directly: {correct_answers}")
-        
-        return options, correct_answers
+        record.option_entries = option_entries
+        return option_entries
     
-    def _is_option_correct(self, option_text: str, feedback_answers: List[str], container) -> bool:
+    def _is_option_correct(self, matches_feedback: bool, container) -> bool:
         """Check if an option is correct based on feedback and container classes"""
         
         # First check feedback answers
-        for feedback_answer in feedback_answers:
-            if self._fuzzy_match(option_text, feedback_answer):
-                return True
+        if matches_feedback:
+            return True
         
         # Fallback: check container classes (less reliable)
         container_classes = container.get('class', [])
@@ -287,50 +551,48 @@ class QuizExtractor:
             
         return False
     
-    def _fuzzy_match(self, option_text: str, correct_answer: str) -> bool:
-        """Check if option text matches correct answer with fuzzy matching"""
-        option_clean = self.clean_text(option_text).lower().strip()
-        answer_clean = self.clean_text(correct_answer).lower().strip()
-        
-        # Exact match
-        if option_clean == answer_clean:
-            return True
-        
-        # Remove common prefixes for matching
-        option_core = re.sub(r'^[a-d]\.\s*', '', option_clean)
-        answer_core = re.sub(r'^[a-d]\.\s*', '', answer_clean)
-        
-        if option_core == answer_core:
-            return True
-        
-        # Partial match for longer answers (but be more conservative)
-        if len(answer_clean) > 15:
-            if answer_clean in option_clean or option_clean in answer_clean:
-                return True
-        
-        # Check if all words in the answer are in the option
-        answer_words = set(answer_core.split())
-        option_words = set(option_core.split())
-        
-        if len(answer_words) > 2 and answer_words.issubset(option_words):
-            return True
-        
-        return False
+    def _extract_response(self, record: QuestionRecord, question: Dict[str, Any]) -> Dict[str, Any]:
+        """Return {'chosen': option texts, 'marks': True/False/None each, 'outcome'} as the attempt page shows them"""
+        chosen = []
+        marks = []
+        if question['type'] == 'truefalse':
+            inputs = record.answer.find_all('input', id=lambda x: x and ('answertrue' in x or 'answerfalse' in x)) if record.answer else []
+            entries = [('True' if 'answertrue' in node['id'] else 'False', node.parent, node) for node in inputs]
+        elif question['type'] != 'essay' and record.answer:
+            entries = [(text, container, container.find('input')) for text, container in self._option_entries(record)]
+        else:
+            entries = []
+        for text, container, node in entries:
+            if node is not None and node.has_attr('checked'):
+                container_classes = container.get('class', [])
+                chosen.append(text)
+                marks.append(True if 'correct' in container_classes else False if 'incorrect' in container_classes else None)
+        
+        state_classes = set(record.div.get('class', []))
+        outcome = next((outcome for state, outcome in QUESTION_OUTCOMES if state in state_classes), None)
+        if outcome is None and question['type'] != 'essay':
+            correct = {option['text'] for option in question['options'] if option['isCorrect']}
+            if not chosen:
+                outcome = 'unanswered'
+            elif correct:
+                if set(chosen) == correct:
+                    outcome = 'correct'
+                elif question['type'] == 'multiple' and correct & set(chosen):
+                    outcome = 'partial'
+                else:
+                    outcome = 'incorrect'
+        return {'chosen': chosen, 'marks': marks, 'outcome': outcome}
     
-    def _extract_correct_answers_from_feedback(self, div) -> List[str]:
+    def _extract_correct_answers_from_feedback(self, record: QuestionRecord) -> List[str]:
         """Extract correct answers from the feedback section - MOST RELIABLE SOURCE"""
         correct_answers = []
         
-        feedback_div = div.find('div', class_='feedback')
-        if not feedback_div:
-            return correct_answers
-            
-        right_answer_div = feedback_div.find('div', class_='rightanswer')
+        right_answer_div = record.rightanswer
         if not right_answer_div:
             return correct_answers
             
         right_answer_text = self.clean_text(right_answer_div.get_text())
-        self.log_debug(f"Rightanswer text: {right_answer_text}")
+        self.log_debug("Rightanswer text: %s", right_answer_text)
         
         if not right_answer_text:
             return correct_answers
@@ -343,7 +605,7 @@ class QuizExtractor:
             answers_part = right_answer_text.split(':', 1)[1].strip()
         elif '"' in right_answer_text:
             # Format: "Đáp án chính xác là "Đúng""
-            quotes_match = re.findall(r'"([^"]+)"', right_answer_text)
+            quotes_match = QUOTED_ANSWER_PATTERN.findall(right_answer_text)
             if quotes_match:
                 answers_part = ', '.join(quotes_match)
         elif any(word in right_answer_text.lower() for word in ['answer is', 'answer are', 'đáp án', 'correct']):
@@ -363,7 +625,7 @@ class QuizExtractor:
                 (answers_part.lower().count(' and ') > 1) or  # Multiple "and"s indicate list
                 'answers are:' in right_answer_text.lower()):  # Explicit plural
                 # Split by obvious delimiters only
-                raw_answers = re.split(r'[,،;]|\bvà\b', answers_part)
+                raw_answers = ANSWER_SEPARATOR_PATTERN.split(answers_part)
             else:
                 # Treat as single answer (don't split on "and")
                 raw_answers = [answers_part]
@@ -371,11 +633,10 @@ class QuizExtractor:
             for answer in raw_answers:
                 clean_answer = self.clean_text(answer).strip()
                 # Filter out common non-answer words and short meaningless fragments
-                filter_words = ['are', 'is', 'the', 'correct', 'answer', 'answers', 'đáp án', 'chính xác', 'là', 'a', 'an']
                 if (clean_answer and 
                     len(clean_answer) > 2 and 
-                    clean_answer.lower() not in filter_words and
-                    not re.match(r'^[a-d]\.?\s*$', clean_answer.lower())):
+                    clean_answer.lower() not in FEEDBACK_FILTER_WORDS and
+                    not BARE_LABEL_PATTERN.match(clean_answer.lower())):
                     correct_answers.append(clean_answer)
         
         return correct_answers
@@ -387,149 +648,327 @@ def remove_duplicate_questions(questions: List[Dict[str, Any]]) -> List[Dict[str
     
     for q in questions:
         # Create a unique key for the question based on its text
-        question_key = q['question'].lower().strip()
-        question_key = re.sub(r'\s+', ' ', question_key)  # Normalize whitespace
+        key = question_key(q)
         
-        if question_key not in seen_questions:
-            seen_questions.add(question_key)
+        if key not in seen_questions:
+            seen_questions.add(key)
             unique_questions.append(q)
     
     return unique_questions
 
-def validate_and_report_questions(questions: List[Dict[str, Any]], source_file: str) -> List[Dict[str, Any]]:
-    """Validate questions and provide detailed reporting"""
-    validated_questions = []
-    issues = []
+def find_quiz_dirs(base_dir: str) -> List[str]:
+    """Return the existing 'Quiz N' directories under base_dir"""
+    quiz_dirs = []
+    for i in [1, 2, 3, 5, 6, 7, 8, 9, 10]:
+        quiz_dir = f'Quiz {i}'
+        if os.path.exists(os.path.join(base_dir, quiz_dir)):
+            quiz_dirs.append(quiz_dir)
+    return quiz_dirs
+
+def list_html_files(quiz_path: str) -> List[str]:
+    """Return the HTML file names of a quiz directory in processing order"""
+    return [f for f in os.listdir(quiz_path) if f.endswith('.html')]
+
+def extract_file(file_path: str, parser: str = 'lxml', stream: bool = False,
+                 metrics: Optional[ExtractionMetrics] = None) -> List[Dict[str, Any]]:
+    """Extract all questions from one HTML file (top-level so worker processes can pickle it)"""
+    extractor = QuizExtractor(file_path, parser, stream=stream, metrics=metrics)
+    return extractor.extract_questions()
+
+def extract_html(content: str, parser: str = 'lxml', name: str = 'upload.html', stream: bool = False,
+                 metrics: Optional[ExtractionMetrics] = None) -> List[Dict[str, Any]]:
+    """Extract all questions from HTML markup held in memory (top-level so worker processes can pickle it)"""
+    extractor = QuizExtractor(name, parser, stream=stream, metrics=metrics, content=content)
+    return extractor.extract_questions()
+
+def _extract_file_with_metrics(file_path: str, parser: str = 'lxml', stream: bool = False,
+                               content: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Worker entry point: extract one file (or its content, read elsewhere) and ship its metrics back with the questions"""
+    metrics = ExtractionMetrics()
+    extractor = QuizExtractor(file_path, parser, stream=stream, metrics=metrics, content=content)
+    return extractor.extract_questions(), metrics.to_dict()
+
+def extract_files(file_paths: List[str], workers: int = 1, parser: str = 'lxml', stream: bool = False,
+                  metrics: Optional[ExtractionMetrics] = None,
+                  executor: Optional[ProcessPoolExecutor] = None) -> List[Tuple[Optional[List[Dict[str, Any]]], Optional[Exception]]]:
+    """Extract every file and return (questions, error) pairs in the same order as file_paths.
+
+    With workers > 1 the files are fanned out over a process pool; results are
+    still collected in input order so the merged output matches the serial path.
+    Per-phase metrics of every file, including those from worker processes,
+    are added to metrics when given. A long-lived executor can be passed in to
+    keep its workers warm across calls; it is left running.
+    """
+    metrics = metrics if metrics is not None else ExtractionMetrics()
+    if workers <= 1 or len(file_paths) <= 1:
+        results = []
+        for file_path in file_paths:
+            try:
+                results.append((extract_file(file_path, parser, stream, metrics), None))
+            except Exception as e:
+                metrics.count('file_errors')
+                results.append((None, e))
+        return results
     
-    print(f"\n📊 VALIDATING {len(questions)} questions from {os.path.basename(source_file)}:")
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return extract_files(file_paths, workers, parser, stream, metrics, executor)
     
-    for i, q in enumerate(questions, 1):
-        has_issues = False
-        
-        # Skip validation for essay questions
-        if q.get('type') == 'essay':
-            validated_questions.append(q)
-            continue
-        
-        # Check if question has correct answers
-        if not q.get('correctAnswers') or len(q['correctAnswers']) == 0:
-            issues.append(f"❌ Q{i}: '{q.get('question', 'Unknown')[:40]}...' has NO correct answers")
-            has_issues = True
-        
-        # Check if options exist for choice questions
-        if q.get('type') in ['single', 'multiple'] and (not q.get('options') or len(q.get('options', [])) == 0):
-            issues.append(f"⚠️  Q{i}: '{q.get('question', 'Unknown')[:40]}...' has NO options")
-            has_issues = True
-        
-        # Check if correct answers match options (for validation, not fixing)
-        if q.get('options') and q.get('correctAnswers'):
-            option_texts = [opt['text'] for opt in q['options']]
-            for correct_answer in q['correctAnswers']:
-                if not any(correct_answer in opt_text or opt_text in correct_answer for opt_text in option_texts):
-                    issues.append(f"⚠️  Q{i}: Correct answer '{correct_answer[:30]}...' not clearly matching any option")
-        
-        # Mark question with issues
-        if has_issues:
-            q['_validation_issues'] = True
-        
-        validated_questions.append(q)
+    futures = [executor.submit(_extract_file_with_metrics, file_path, parser, stream) for file_path in file_paths]
+    results = []
+    for future in futures:
+        try:
+            questions, file_metrics = future.result()
+            metrics.merge(file_metrics)
+            results.append((questions, None))
+        except Exception as e:
+            metrics.count('file_errors')
+            results.append((None, e))
+    return results
+
+def build_quiz_database(base_dir: str, quiz_dirs: List[str], workers: int = 1,
+                        cache: Optional[ExtractionCache] = None, parser: str = 'lxml',
+                        stream: bool = False, dedup: str = 'exact', similarity: float = DEFAULT_SIMILARITY,
+                        metrics: Optional[ExtractionMetrics] = None,
+                        executor: Optional[ProcessPoolExecutor] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Extract, deduplicate and validate every quiz directory
+
+    When a cache is given only new or changed files are parsed; everything else
+    is reused and the merged result is deduplicated and validated as usual.
+    dedup='near' also collapses questions whose text and option set are at
+    least `similarity` alike (see near_duplicates). Phase timings and counters
+    are collected in metrics when given.
+    """
+    metrics = metrics if metrics is not None else ExtractionMetrics()
+    # Collect every file up front so a single pool is shared across all quizzes
+    quiz_files = {}
+    all_files = []
+    for quiz_dir in quiz_dirs:
+        quiz_path = os.path.join(base_dir, quiz_dir)
+        if os.path.exists(quiz_path):
+            quiz_files[quiz_dir] = [os.path.join(quiz_path, f) for f in list_html_files(quiz_path)]
+            all_files.extend(quiz_files[quiz_dir])
     
-    # Print summary
-    issues_count = len([q for q in validated_questions if q.get('_validation_issues')])
-    if issues:
-        print(f"📋 Found {len(issues)} validation issues:")
-        for issue in issues[:10]:  # Show first 10 issues
-            print(f"    {issue}")
-        if len(issues) > 10:
-            print(f"    ... and {len(issues) - 10} more issues")
+    results = {}
+    content_hashes = {}
+    pending_files = all_files
+    if cache is not None:
+        pending_files = []
+        for file_path in all_files:
+            content_hashes[file_path] = ExtractionCache.file_hash(file_path)
+            questions = cache.get(file_path, content_hashes[file_path], parser, stream)
+            if questions is None:
+                pending_files.append(file_path)
+            else:
+                results[file_path] = (questions, None)
+        cache.prune(all_files)
+        metrics.count('cache_hits', cache.hits)
+        metrics.count('cache_misses', len(pending_files))
+        print(f"\n♻️  Cache: {cache.hits} files unchanged, {len(pending_files)} to extract")
     
-    print(f"✅ Processed: {len(validated_questions)} questions ({issues_count} with issues)")
+    if workers > 1 and pending_files:
+        print(f"\n⚙️  Extracting {len(pending_files)} HTML files with {workers} worker processes")
+    for file_path, result in zip(pending_files, extract_files(pending_files, workers, parser, stream, metrics, executor)):
+        results[file_path] = result
+        questions, error = result
+        if cache is not None and error is None:
+            cache.put(file_path, content_hashes[file_path], parser, stream, questions)
     
-    return validated_questions
+    return merge_quiz_results(quiz_files, results, dedup, similarity, metrics)
 
-if __name__ == '__main__':
-    # Setup paths
-    base_dir = '.'
+def merge_quiz_results(quiz_files: Dict[str, List[str]],
+                       results: Dict[str, Tuple[Optional[List[Dict[str, Any]]], Optional[Exception]]],
+                       dedup: str = 'exact', similarity: float = DEFAULT_SIMILARITY,
+                       metrics: Optional[ExtractionMetrics] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Merge per-file (questions, error) results into deduplicated per-quiz question lists
+
+    quiz_files lists each quiz's files in order; failed files are reported and skipped.
+    """
+    metrics = metrics if metrics is not None else ExtractionMetrics()
+    all_quiz_data = {}
+    
+    # Merge results per quiz in file order
+    for quiz_dir, file_paths in quiz_files.items():
+        print(f"\n{'='*60}")
+        print(f"🎯 PROCESSING {quiz_dir}")
+        print(f"{'='*60}")
+        
+        all_questions = []
+        print(f"📂 Found {len(file_paths)} HTML files")
+        
+        for file_path in file_paths:
+            filename = os.path.basename(file_path)
+            print(f"\n📄 Processing: {filename}")
+            questions, error = results[file_path]
+            if error is not None:
+                print(f"    ❌ Error processing {filename}: {error}")
+                continue
+            print(f"    ✅ Extracted {len(questions)} questions")
+            all_questions.extend(questions)
+        
+        # Remove duplicates from this quiz
+        with metrics.phase('dedup'):
+            unique_questions = remove_duplicate_questions(all_questions)
+        print(f"\n🔄 Removed duplicates: {len(all_questions)} → {len(unique_questions)} unique questions")
+        
+        if dedup == 'near':
+            exact_count = len(unique_questions)
+            with metrics.phase('dedup'):
+                unique_questions, clusters = remove_near_duplicate_questions(unique_questions, similarity)
+            print(f"🔗 Near-duplicates: {len(clusters)} clusters, {exact_count} → {len(unique_questions)} questions")
+            for cluster in clusters[:10]:
+                print(f"    • kept '{cluster[0]['question'][:50]}...' over {len(cluster) - 1} variant(s)")
+            if len(clusters) > 10:
+                print(f"    ... and {len(clusters) - 10} more clusters")
+        
+        all_quiz_data[quiz_dir] = unique_questions
+        print(f"📊 {quiz_dir} Summary: {len(unique_questions)} questions")
+    
+    return all_quiz_data
+
+def build_arg_parser(description: str = 'Extract Moodle quiz attempt pages into quiz_database.json') -> argparse.ArgumentParser:
+    """Return the command line options shared by the extractor and the watcher"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of extraction processes (0 = one per CPU, default: 1)')
+    parser.add_argument('--parser', choices=PARSER_BACKENDS, default='lxml',
+                        help='HTML parser backend (default: lxml)')
+    parser.add_argument('--stream', action='store_true',
+                        help='read pages incrementally, one question container at a time (for very large exports)')
+    parser.add_argument('--dedup', choices=['exact', 'near'], default='exact',
+                        help='exact: identical question text only; near: also MinHash/LSH near-duplicates')
+    parser.add_argument('--similarity', type=float, default=DEFAULT_SIMILARITY,
+                        help=f'minimum similarity for --dedup near (default: {DEFAULT_SIMILARITY})')
+    parser.add_argument('--format', choices=['indexed', 'legacy', 'sharded'], default='indexed',
+                        help='indexed: questions stored once and referenced by ID from each quiz (default); '
+                             'legacy: one full question list per quiz; '
+                             'sharded: manifest plus one minified file per quiz in --shard-dir')
+    parser.add_argument('--shard-dir', default='quiz_db', help='output directory for --format sharded (default: quiz_db)')
+    parser.add_argument('--compress', nargs='*', choices=COMPRESSIONS, default=['gzip'],
+                        help='precompressed copies written next to each shard (default: gzip)')
+    parser.add_argument('--output', default='quiz_database.json', help='database file to write')
+    parser.add_argument('--validation-report', metavar='PATH',
+                        help=f'validation report to write (default: {VALIDATION_REPORT_FILE} next to --output)')
+    parser.add_argument('--no-search-index', action='store_true',
+                        help=f'skip the full-text {SEARCH_INDEX_FILE} written next to indexed and sharded databases')
+    parser.add_argument('--binary', metavar='PATH', nargs='?', const=BINARY_DATABASE_FILE,
+                        help=f'also export the bank to a memory-mappable binary file (default: {BINARY_DATABASE_FILE})')
+    parser.add_argument('--cache', default='.quiz_extraction_cache.json',
+                        help='per-file extraction cache (default: .quiz_extraction_cache.json)')
+    parser.add_argument('--no-cache', action='store_true', help='re-extract every file and leave the cache untouched')
+    parser.add_argument('--verbose', action='store_true', help='print per-question debug lines while extracting')
+    parser.add_argument('--metrics', metavar='PATH', help="write phase timings and counters to PATH ('-' for stdout)")
+    parser.add_argument('--metrics-format', choices=METRICS_FORMATS, default='json',
+                        help='format of --metrics output (default: json)')
+    return parser
+
+def find_base_dir() -> str:
+    """Return the directory holding the 'Quiz N' folders"""
     if os.path.basename(os.getcwd()) == 'quiz_app':
-        base_dir = '..'
+        return '..'
+    return '.'
+
+def write_database(database: Dict[str, Any], output_file: str):
+    """Write the database JSON atomically, so readers never see a half-written file"""
+    write_atomic(output_file, json.dumps(database, ensure_ascii=False, indent=2).encode('utf-8'))
+
+def publish_database(all_quiz_data: Dict[str, List[Dict[str, Any]]], args: argparse.Namespace,
+                     metrics: Optional[ExtractionMetrics] = None) -> Tuple[str, ValidationReport]:
+    """Write the extracted quizzes in the requested --format plus the validation report of the published bank
+
+    Returns the published file and the report.
+    """
+    metrics = metrics if metrics is not None else ExtractionMetrics()
+    # Store each question once and let quizzes reference it by ID
+    database = all_quiz_data
+    if args.format != 'legacy':
+        database = build_indexed_database(all_quiz_data, args.dedup, args.similarity)
+        references = sum(len(ids) for ids in database['quizzes'].values())
+        print(f"\n🌐 Global index: {len(database['questions'])} unique questions referenced {references} times")
     
-    quiz_dirs = []
+    if args.format == 'sharded':
+        manifest = write_sharded_database(database, args.shard_dir, args.compress)
+        shard_bytes = sum(entry['bytes']['json'] for entry in manifest['quizzes'].values())
+        print(f"🧩 Wrote {len(manifest['quizzes'])} shards ({shard_bytes / 1024:.1f} KB minified) to {args.shard_dir}")
+        output_file = os.path.join(args.shard_dir, MANIFEST_FILE)
+    else:
+        write_database(database, args.output)
+        output_file = args.output
+    
+    # Legacy databases carry no question IDs for the index to point at
+    if args.format != 'legacy' and not args.no_search_index:
+        index_file = os.path.join(os.path.dirname(output_file), SEARCH_INDEX_FILE)
+        sizes = write_search_index(database, index_file, args.compress if args.format == 'sharded' else ())
+        print(f"🔎 Search index: {index_file} ({sizes['json'] / 1024:.1f} KB minified)")
+    
+    if args.binary:
+        size = write_binary_database(database, args.binary)
+        print(f"💾 Binary bank: {args.binary} ({size / 1024:.1f} KB)")
+    
+    # Issues go to a separate report so the shipped database carries no validation state
+    with metrics.phase('validation'):
+        report = validate_database(database)
+    for rule, count in report.rule_counts.items():
+        metrics.count(f'validation_{rule}', count)
+    metrics.count('questions_invalid', len(report.invalid_ids))
+    report_file = args.validation_report or os.path.join(os.path.dirname(args.output), VALIDATION_REPORT_FILE)
+    report.write(report_file)
+    report.print_summary()
+    print(f"📋 Validation report: {report_file}")
+    return output_file, report
+
+def main(argv: Optional[List[str]] = None):
+    args = build_arg_parser().parse_args(argv)
+    
+    configure_logging(args.verbose)
+    metrics = ExtractionMetrics()
+    
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    
+    # Setup paths
+    base_dir = find_base_dir()
     
     print(f"Looking for Quiz directories in: {os.path.abspath(base_dir)}")
     
     # Check for all possible quiz directories
-    for i in [1, 2, 3, 5, 6, 7, 8, 9, 10]:
-        quiz_dir = f'Quiz {i}'
-        if os.path.exists(os.path.join(base_dir, quiz_dir)):
-            quiz_dirs.append(quiz_dir)
+    quiz_dirs = find_quiz_dirs(base_dir)
     
     print(f"Found quiz directories: {quiz_dirs}")
     
-    all_quiz_data = {}
-    total_extracted = 0
-    total_issues = 0
+    cache = None if args.no_cache else ExtractionCache(args.cache, EXTRACTOR_VERSION).load()
     
-    # Process each quiz directory
-    for quiz_dir in quiz_dirs:
-        quiz_path = os.path.join(base_dir, quiz_dir)
-        if os.path.exists(quiz_path):
-            print(f"\n{'='*60}")
-            print(f"🎯 PROCESSING {quiz_dir}")
-            print(f"{'='*60}")
-            
-            # Process files in this quiz directory
-            all_questions = []
-            html_files = [f for f in os.listdir(quiz_path) if f.endswith('.html')]
-            
-            print(f"📂 Found {len(html_files)} HTML files")
-            
-            for filename in html_files:
-                file_path = os.path.join(quiz_path, filename)
-                print(f"\n📄 Processing: {filename}")
-                try:
-                    extractor = QuizExtractor(file_path)
-                    questions = extractor.extract_questions()
-                    print(f"    ✅ Extracted {len(questions)} questions")
-                    all_questions.extend(questions)
-                except Exception as e:
-                    print(f"    ❌ Error processing {filename}: {e}")
-            
-            # Remove duplicates from this quiz
-            unique_questions = remove_duplicate_questions(all_questions)
-            print(f"\n🔄 Removed duplicates: {len(all_questions)} → {len(unique_questions)} unique questions")
-            
-            # Validate questions for this quiz
-            validated_questions = validate_and_report_questions(unique_questions, quiz_dir)
-            
-            # Count issues
-            quiz_issues = len([q for q in validated_questions if q.get('_validation_issues')])
-            total_extracted += len(validated_questions)
-            total_issues += quiz_issues
-            
-            all_quiz_data[quiz_dir] = validated_questions
-            
-            print(f"📊 {quiz_dir} Summary: {len(validated_questions)} questions, {quiz_issues} issues")
+    all_quiz_data = build_quiz_database(base_dir, quiz_dirs, workers, cache, args.parser, args.stream,
+                                        args.dedup, args.similarity, metrics)
+    if cache is not None:
+        cache.save()
+    total_extracted = sum(len(questions) for questions in all_quiz_data.values())
     
-    # Save all data to JSON file
-    output_file = 'quiz_database.json'
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(all_quiz_data, f, ensure_ascii=False, indent=2)
+    output_file, report = publish_database(all_quiz_data, args, metrics)
+    total_unique = report.question_count
+    total_issues = len(report.invalid_ids)
     
     # Print final comprehensive summary
     print(f"\n🎉 EXTRACTION COMPLETED!")
     print(f"{'='*60}")
     print(f"📊 FINAL SUMMARY:")
     print(f"   📁 Total quizzes processed: {len(all_quiz_data)}")
-    print(f"   📝 Total questions extracted: {total_extracted}")
+    print(f"   📝 Total questions extracted: {total_extracted} ({total_unique} unique)")
     print(f"   ⚠️  Questions with issues: {total_issues}")
     print(f"   📄 Database saved to: {output_file}")
-    print(f"   📈 Success rate: {((total_extracted - total_issues) / total_extracted * 100):.1f}%")
+    print(f"   📈 Success rate: {((total_unique - total_issues) / max(total_unique, 1) * 100):.1f}%")
+    print(f"   ⏱️  Phase timings: {metrics.summary()}")
     
     if total_issues > 0:
-        print(f"\n⚠️  Please review the {total_issues} questions with validation issues above.")
+        print(f"\n⚠️  Please review the {total_issues} invalid questions listed in the validation report.")
         print(f"💡 Issues are typically caused by:")
         print(f"   - Missing rightanswer sections in HTML")
         print(f"   - Malformed HTML structure")
         print(f"   - Complex answer formats requiring manual review")
     else:
-        print(f"\n✅ All questions validated successfully! 🎉")
\ No newline at end of file
+        print(f"\n✅ All questions validated successfully! 🎉")
+    
+    if args.metrics:
+        metrics.write(args.metrics, args.metrics_format)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,384 @@
+import os
+import re
+import glob
+import time
+import queue
+import tarfile
+import zipfile
+import threading
+from functools import partial
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, Callable
+from extraction_cache import ExtractionCache
+from instrumentation import ExtractionMetrics, configure_logging
+from quiz_extractor import (EXTRACTOR_VERSION, build_arg_parser, _extract_file_with_metrics, list_html_files,
+                            merge_quiz_results, publish_database)
+
+DEFAULT_CHECKPOINT = '.quiz_ingest_checkpoint.json'
+DEFAULT_IO_THREADS = 2
+DEFAULT_PREFETCH = 32
+DEFAULT_CHECKPOINT_EVERY = 100
+
+# Separates an archive path from a member path in page keys, e.g. 'fall.zip::Quiz 3/attempt1.html'
+MEMBER_SEPARATOR = '::'
+
+QUIZ_DIR_PATTERN = re.compile(r'^quiz\s*\d+$', re.IGNORECASE)
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+def is_archive(path: str) -> bool:
+    return path.lower().endswith(ARCHIVE_SUFFIXES)
+
+def is_html_page(name: str) -> bool:
+    """HTML files, leaving out the resource-fork copies macOS adds to zips"""
+    parts = name.replace('\\', '/').split('/')
+    return name.endswith('.html') and '__MACOSX' not in parts and not parts[-1].startswith('._')
+
+def archive_stem(path: str) -> str:
+    """'exports/Quiz 3.tar.gz' -> 'Quiz 3'"""
+    name = os.path.basename(path)
+    for suffix in ARCHIVE_SUFFIXES:
+        if name.lower().endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+def quiz_name_for(key: str, default: str) -> str:
+    """Return the nearest 'Quiz N' folder on a page's path, or default"""
+    for part in reversed(re.split(r'[\\/]|' + re.escape(MEMBER_SEPARATOR), key)[:-1]):
+        if QUIZ_DIR_PATTERN.match(part):
+            return part
+    return default
+
+def quiz_sort_key(quiz_name: str) -> tuple:
+    """'Quiz 2' before 'Quiz 10', other names alphabetically after them"""
+    digits = re.sub(r'\D', '', quiz_name)
+    return (0, int(digits), quiz_name) if QUIZ_DIR_PATTERN.match(quiz_name) else (1, 0, quiz_name)
+
+class Page:
+    __slots__ = ('source', 'position', 'key', 'quiz', 'fingerprint', 'content', 'error', 'read_seconds')
+
+    def __init__(self, source: int, position: int, key: str, quiz: Optional[str], fingerprint: str = '',
+                 content: Optional[bytes] = None, error: Optional[Exception] = None, read_seconds: float = 0.0):
+        """One HTML page of a source, read ahead by PrefetchReader
+
+        (source, position) orders pages as the sources list them. content is
+        None when the checkpoint already holds the page, or when reading it
+        failed (error is then set). quiz is None only for the error of a
+        source that could not be listed, which belongs to no quiz.
+        """
+        self.source = source
+        self.position = position
+        self.key = key
+        self.quiz = quiz
+        self.fingerprint = fingerprint
+        self.content = content
+        self.error = error
+        self.read_seconds = read_seconds
+
+class PageSource:
+    def __init__(self, path: str, quiz: Optional[str] = None):
+        """An archive, a directory (searched recursively) or a single HTML file
+
+        Pages are named path::member for archive members and by their path
+        otherwise. Their quiz is the nearest 'Quiz N' folder on that name,
+        else quiz, else the archive's stem or the file's folder name.
+        """
+        self.path = path
+        self.quiz = quiz
+
+    def _default_quiz(self, file_path: str) -> str:
+        if self.quiz:
+            return self.quiz
+        if is_archive(self.path):
+            return archive_stem(self.path)
+        return os.path.basename(os.path.dirname(os.path.abspath(file_path))) or 'Quiz'
+
+    def pages(self) -> Iterator[Tuple[str, str, str, Callable[[], bytes]]]:
+        """Yield (key, quiz, fingerprint, read) for each page without reading it
+
+        The fingerprint identifies the page's content cheaply (CRC and size for
+        zip members, size and mtime otherwise) so a resumed run can skip pages
+        without reading them. read() is only valid until the next page is
+        requested, since tar archives are read as a stream.
+        """
+        if self.path.lower().endswith('.zip'):
+            with zipfile.ZipFile(self.path) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and is_html_page(info.filename):
+                        key = f"{self.path}{MEMBER_SEPARATOR}{info.filename}"
+                        yield (key, quiz_name_for(key, self._default_quiz(self.path)),
+                               f"crc:{info.CRC:08x}:{info.file_size}", lambda info=info: archive.read(info))
+        elif is_archive(self.path):
+            # Stream mode reads the archive front to back, without seeking or an index
+            with tarfile.open(self.path, 'r|*') as archive:
+                for member in archive:
+                    if member.isfile() and is_html_page(member.name):
+                        key = f"{self.path}{MEMBER_SEPARATOR}{member.name}"
+                        yield (key, quiz_name_for(key, self._default_quiz(self.path)),
+                               f"size:{member.size}:{int(member.mtime)}",
+                               lambda member=member: archive.extractfile(member).read())
+        else:
+            if os.path.isdir(self.path):
+                # Files of a folder in the same order quiz_extractor reads them, subfolders sorted
+                file_paths = []
+                for dir_path, dir_names, _ in os.walk(self.path):
+                    dir_names.sort()
+                    file_paths.extend(os.path.join(dir_path, name) for name in list_html_files(dir_path))
+            else:
+                file_paths = [self.path]
+            for file_path in file_paths:
+                if not is_html_page(file_path):
+                    continue
+                stat = os.stat(file_path)
+                yield (file_path, quiz_name_for(file_path, self._default_quiz(file_path)),
+                       f"size:{stat.st_size}:{stat.st_mtime_ns}", lambda file_path=file_path: _read_file(file_path))
+
+def _read_file(file_path: str) -> bytes:
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+def expand_sources(patterns: Iterable[str], quiz: Optional[str] = None) -> List[PageSource]:
+    """Turn paths and glob patterns ('exports/**/*.zip') into sources, in sorted order per pattern
+
+    Paths inside a folder that is already a source are left out, so 'exports/**'
+    does not ingest every page once for each folder above it.
+    """
+    sources = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            print(f"⚠️  No files match {pattern}")
+        for path in map(os.path.normpath, matches):
+            if not (os.path.isdir(path) or is_archive(path) or is_html_page(path)):
+                continue
+            parent, covered = path, False
+            while parent and not covered:
+                covered = parent in seen
+                parent, previous = os.path.dirname(parent), parent
+                if parent == previous:
+                    break
+            if not covered:
+                seen.add(path)
+                sources.append(PageSource(path, quiz))
+    return sources
+
+class PrefetchReader:
+    def __init__(self, sources: List[PageSource], io_threads: int = DEFAULT_IO_THREADS,
+                 prefetch: int = DEFAULT_PREFETCH, skip: Optional[Callable[[str, str], bool]] = None):
+        """Read the pages of several sources ahead of the parser on background threads
+
+        Each thread takes the next unread source and reads its pages into a
+        queue holding at most prefetch pages, so I/O and decompression overlap
+        parsing while memory stays bounded. Pages for which skip(key,
+        fingerprint) is true are passed on without being read. A failure to
+        read a page, or to open a whole source, becomes a Page with error set
+        instead of stopping the other pages.
+        """
+        self.sources = sources
+        self.io_threads = max(1, min(io_threads, len(sources) or 1))
+        self.skip = skip or (lambda key, fingerprint: False)
+        self._queue = queue.Queue(maxsize=max(1, prefetch))
+        self._next_source = iter(enumerate(sources))
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read_sources(self):
+        while not self._stop.is_set():
+            with self._lock:
+                source_number, source = next(self._next_source, (None, None))
+            if source is None:
+                break
+            position = 0
+            try:
+                for key, quiz, fingerprint, read in source.pages():
+                    page = Page(source_number, position, key, quiz, fingerprint)
+                    position += 1
+                    if not self.skip(key, fingerprint):
+                        start = time.perf_counter()
+                        try:
+                            page.content = read()
+                        except Exception as e:
+                            page.error = e
+                        page.read_seconds = time.perf_counter() - start
+                    if not self._put(page):
+                        return
+            except Exception as e:
+                # The source itself is unreadable (e.g. a truncated archive): report it once, keep the pages read so far
+                self._put(Page(source_number, position, source.path, None, error=e))
+        self._put(None)
+
+    def __iter__(self) -> Iterator[Page]:
+        self._threads = [threading.Thread(target=self._read_sources, name=f'ingest-reader-{n}', daemon=True)
+                         for n in range(self.io_threads)]
+        for thread in self._threads:
+            thread.start()
+        running = len(self._threads)
+        try:
+            while running:
+                page = self._queue.get()
+                if page is None:
+                    running -= 1
+                else:
+                    yield page
+        finally:
+            self.close()
+
+    def close(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+def _collect(future, page: Page) -> Tuple[Page, Any, Optional[Exception]]:
+    try:
+        return page, future.result(), None
+    except Exception as e:
+        return page, None, e
+
+def map_pages(pages: Iterable[Page], work: Callable[..., Any],
+              workers: int = 1) -> Iterator[Tuple[Page, Any, Optional[Exception]]]:
+    """Apply work(page key, content=page text) to every page read, yielding (page, result, error)
+
+    Pages that failed to read or decode come out with their error, pages
+    passed on unread (skipped) with result None. With workers > 1, work runs
+    in a process pool (it must be picklable, e.g. a functools.partial of a
+    top-level function) with at most two pages per worker in flight, so
+    read-ahead never outruns the parsers by more than the reader's prefetch;
+    results may then come out of order.
+    """
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    in_flight = deque()
+    try:
+        for page in pages:
+            if page.error is not None or page.content is None:
+                yield page, None, page.error
+                continue
+            try:
+                content = page.content.decode('utf-8')
+            except UnicodeDecodeError as e:
+                yield page, None, e
+                continue
+            page.content = None
+            if executor is None:
+                try:
+                    result = work(page.key, content=content)
+                except Exception as e:
+                    yield page, None, e
+                else:
+                    yield page, result, None
+                continue
+            in_flight.append((executor.submit(work, page.key, content=content), page))
+            while len(in_flight) >= 2 * workers:
+                yield _collect(*in_flight.popleft())
+        while in_flight:
+            yield _collect(*in_flight.popleft())
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+def ingest_sources(sources: List[PageSource], workers: int = 1, io_threads: int = DEFAULT_IO_THREADS,
+                   prefetch: int = DEFAULT_PREFETCH, parser: str = 'lxml', stream: bool = False,
+                   checkpoint: Optional[ExtractionCache] = None, checkpoint_every: int = DEFAULT_CHECKPOINT_EVERY,
+                   metrics: Optional[ExtractionMetrics] = None
+                   ) -> Tuple[Dict[str, List[str]], Dict[str, Tuple[Optional[List[Dict[str, Any]]], Optional[Exception]]]]:
+    """Extract every page of the sources; returns (quiz -> page keys in order, page key -> (questions, error))
+
+    Pages already in the checkpoint with the same fingerprint are not read
+    again. Newly extracted pages are added to it and it is saved every
+    checkpoint_every pages, so an interrupted run resumes where it stopped.
+    With workers > 1 pages are parsed in a process pool (see map_pages).
+    A source that cannot be listed keeps the pages read before the failure;
+    its error is reported and counted but starts no quiz of its own.
+    """
+    metrics = metrics if metrics is not None else ExtractionMetrics()
+    skip = partial(checkpoint.has, parser=parser, stream=stream) if checkpoint is not None else None
+    reader = PrefetchReader(sources, io_threads, prefetch, skip)
+    work = partial(_extract_file_with_metrics, parser=parser, stream=stream)
+    results = {}
+    order = {}
+    extracted = 0
+    try:
+        for page, result, error in map_pages(reader, work, workers):
+            order[page.key] = (page.source, page.position, page.quiz)
+            if page.read_seconds:
+                metrics.add_time('read', page.read_seconds)
+            if error is not None:
+                metrics.count('file_errors')
+                results[page.key] = (None, error)
+            elif result is None:
+                results[page.key] = (checkpoint.get(page.key, page.fingerprint, parser, stream), None)
+            else:
+                questions, page_metrics = result
+                metrics.merge(page_metrics)
+                results[page.key] = (questions, None)
+                if checkpoint is not None:
+                    checkpoint.put(page.key, page.fingerprint, parser, stream, questions)
+                    extracted += 1
+                    if extracted % checkpoint_every == 0:
+                        checkpoint.save()
+    finally:
+        reader.close()
+        if checkpoint is not None:
+            checkpoint.save()
+
+    quiz_files = {}
+    for key in sorted(order, key=lambda key: order[key][:2]):
+        if order[key][2] is None:
+            print(f"❌ Error reading {key}: {results[key][1]}")
+        else:
+            quiz_files.setdefault(order[key][2], []).append(key)
+    quiz_files = {quiz_name: quiz_files[quiz_name] for quiz_name in sorted(quiz_files, key=quiz_sort_key)}
+    return quiz_files, results
+
+def main(argv: Optional[List[str]] = None):
+    parser = build_arg_parser('Extract attempt pages from zip/tar archives, folders and glob patterns')
+    parser.add_argument('sources', nargs='+',
+                        help="archives (.zip, .tar, .tar.gz, ...), folders, HTML files or glob patterns such as 'exports/**/*.zip'")
+    parser.add_argument('--quiz', help="quiz for pages outside any 'Quiz N' folder (default: the archive or folder name)")
+    parser.add_argument('--io-threads', type=int, default=DEFAULT_IO_THREADS,
+                        help=f'threads reading and decompressing sources ahead of the parser (default: {DEFAULT_IO_THREADS})')
+    parser.add_argument('--prefetch', type=int, default=DEFAULT_PREFETCH,
+                        help=f'pages read ahead at most (default: {DEFAULT_PREFETCH})')
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT,
+                        help=f'progress file a rerun resumes from (default: {DEFAULT_CHECKPOINT}; --no-cache disables it)')
+    parser.add_argument('--checkpoint-every', type=int, default=DEFAULT_CHECKPOINT_EVERY,
+                        help=f'save the checkpoint after this many extracted pages (default: {DEFAULT_CHECKPOINT_EVERY})')
+    args = parser.parse_args(argv)
+
+    configure_logging(args.verbose)
+    metrics = ExtractionMetrics()
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    sources = expand_sources(args.sources, args.quiz)
+    print(f"📦 Ingesting {len(sources)} sources with {args.io_threads} reader threads")
+
+    checkpoint = None if args.no_cache else ExtractionCache(args.checkpoint, EXTRACTOR_VERSION).load()
+    resumable = len(checkpoint.entries) if checkpoint is not None else 0
+    start = time.perf_counter()
+    quiz_files, results = ingest_sources(sources, workers, args.io_threads, args.prefetch, args.parser, args.stream,
+                                         checkpoint, args.checkpoint_every, metrics)
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for _, error in results.values() if error is not None)
+    if checkpoint is not None:
+        metrics.count('cache_hits', checkpoint.hits)
+        print(f"♻️  Checkpoint: {checkpoint.hits} of {resumable} saved pages reused")
+    print(f"📥 {len(results)} pages in {elapsed:.1f}s ({len(results) / max(elapsed, 1e-9):.0f} pages/s), {failed} failed")
+
+    all_quiz_data = merge_quiz_results(quiz_files, results, args.dedup, args.similarity, metrics)
+    output_file, report = publish_database(all_quiz_data, args, metrics)
+    print(f"\n🎉 Ingested {sum(len(qs) for qs in all_quiz_data.values())} questions from {len(all_quiz_data)} quizzes "
+          f"({report.question_count} unique, {len(report.invalid_ids)} invalid) into {output_file}")
+    if args.metrics:
+        metrics.write(args.metrics, args.metrics_format)
+
+if __name__ == '__main__':
+    main()
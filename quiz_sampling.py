@@ -0,0 +1,209 @@
+import json
+import random
+import bisect
+import argparse
+from array import array
+from typing import List, Dict, Any, Optional, Iterable, Tuple, Set
+from sharded_output import load_database
+from question_validation import invalid_question_ids
+
+# Rejection sampling gives up after this many draws per requested question and
+# falls back to enumerating the stratum (only happens for near-exhaustive samples)
+MAX_DRAWS_PER_QUESTION = 20
+
+# Above this fraction of a stratum, enumerating it beats rejection sampling
+ENUMERATE_FRACTION = 0.5
+
+class SamplingIndex:
+    def __init__(self, database: Dict[str, Any], invalid_ids: Optional[Set[str]] = None):
+        """Compact positional index of an indexed database for random quiz sampling
+
+        Every unique question gets a position. Per quiz, positions are bucketed
+        by question type and validity into typed arrays, and each position keeps
+        a bitmask of the quizzes containing it. A sample then costs O(count)
+        random draws instead of concatenating, deduplicating and shuffling the
+        selected quizzes. Validity comes from the error rules of
+        question_validation unless invalid_ids is given.
+        """
+        if invalid_ids is None:
+            invalid_ids = invalid_question_ids(database)
+        self.ids = []
+        self.quiz_names = list(database['quizzes'])
+        self.membership = []
+        self.buckets = {}
+        position_of = {}
+        questions = database['questions']
+        for quiz_bit, quiz_name in enumerate(self.quiz_names):
+            for qid in database['quizzes'][quiz_name]:
+                position = position_of.get(qid)
+                if position is None:
+                    position = position_of[qid] = len(self.ids)
+                    self.ids.append(qid)
+                    self.membership.append(0)
+                if self.membership[position] >> quiz_bit & 1:
+                    continue
+                self.membership[position] |= 1 << quiz_bit
+                q = questions[qid]
+                key = (quiz_name, q.get('type', 'single'), qid not in invalid_ids)
+                self.buckets.setdefault(key, array('I')).append(position)
+        self.types = sorted({qtype for _, qtype, _ in self.buckets})
+        self._stratum_sizes = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def valid_count(self, quizzes: Optional[Iterable[str]] = None) -> int:
+        """Number of distinct valid questions in the given quizzes (all quizzes by default)"""
+        return self.pool_size(quizzes, valid_only=True)
+
+    def pool_size(self, quizzes: Optional[Iterable[str]] = None, valid_only: bool = True) -> int:
+        selected_mask = self._selected_mask(quizzes)
+        strata = self._strata(selected_mask, valid_only, None)
+        return sum(self._stratum_weights(strata, selected_mask, valid_only, None).values())
+
+    def _selected_mask(self, quizzes: Optional[Iterable[str]]) -> int:
+        if quizzes is None:
+            return (1 << len(self.quiz_names)) - 1
+        mask = 0
+        for quiz_name in quizzes:
+            if quiz_name not in self.quiz_names:
+                raise KeyError(quiz_name)
+            mask |= 1 << self.quiz_names.index(quiz_name)
+        return mask
+
+    def _owner(self, position: int, selected_mask: int) -> str:
+        """The first selected quiz containing a question; only its bucket may yield it"""
+        bits = self.membership[position] & selected_mask
+        return self.quiz_names[(bits & -bits).bit_length() - 1]
+
+    def _strata(self, selected_mask: int, valid_only: bool,
+                types: Optional[Iterable[str]]) -> Dict[str, List[Tuple[str, array]]]:
+        wanted_types = set(types) if types is not None else None
+        strata = {}
+        for (quiz_name, qtype, valid), positions in self.buckets.items():
+            if (not valid and valid_only) or (wanted_types is not None and qtype not in wanted_types):
+                continue
+            if selected_mask >> self.quiz_names.index(quiz_name) & 1:
+                strata.setdefault(qtype, []).append((quiz_name, positions))
+        return strata
+
+    def sample(self, count: int, quizzes: Optional[Iterable[str]] = None, seed: Optional[int] = None,
+               valid_only: bool = True, types: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Draw a seeded random sample of distinct question IDs, stratified by question type
+
+        The sample mirrors the type mix of the selected quizzes (largest
+        remainder apportionment), every question is equally likely within its
+        type even when it belongs to several selected quizzes, and the same
+        seed always reproduces the same sample. Returns {'seed', 'ids', 'strata'}.
+        """
+        if seed is None:
+            seed = random.SystemRandom().randrange(1 << 32)
+        rnd = random.Random(seed)
+        selected_mask = self._selected_mask(quizzes)
+        strata = self._strata(selected_mask, valid_only, types)
+
+        # Cross-quiz dedup makes shared questions common, so strata are weighted
+        # by their distinct questions (each counted in its owner quiz only)
+        weights = self._stratum_weights(strata, selected_mask, valid_only, types)
+        quotas = _apportion(count, weights)
+
+        chosen = []
+        sizes = {}
+        for qtype in sorted(quotas):
+            drawn = self._sample_stratum(strata[qtype], quotas[qtype], selected_mask, rnd)
+            chosen.extend(drawn)
+            sizes[qtype] = len(drawn)
+        # Any stratum that came up short hands the rest to whichever strata still have room
+        shortfall = sum(quotas.values()) - len(chosen)
+        if shortfall > 0:
+            taken = set(chosen)
+            for qtype in sorted(quotas):
+                if shortfall <= 0 or weights[qtype] <= sizes[qtype]:
+                    continue
+                rest = [position for position in self._stratum_pool(strata[qtype], selected_mask) if position not in taken]
+                extra = rnd.sample(rest, min(shortfall, len(rest)))
+                chosen.extend(extra)
+                sizes[qtype] += len(extra)
+                shortfall -= len(extra)
+        rnd.shuffle(chosen)
+        return {'seed': seed, 'ids': [self.ids[position] for position in chosen], 'strata': sizes}
+
+    def _stratum_weights(self, strata: Dict[str, List[Tuple[str, array]]], selected_mask: int, valid_only: bool,
+                         types: Optional[Iterable[str]]) -> Dict[str, int]:
+        """Distinct questions per type among the selected quizzes, cached per selection"""
+        key = (selected_mask, valid_only, tuple(sorted(types)) if types is not None else None)
+        weights = self._stratum_sizes.get(key)
+        if weights is None:
+            weights = self._stratum_sizes[key] = {qtype: len(self._stratum_pool(buckets, selected_mask))
+                                                  for qtype, buckets in strata.items()}
+        return weights
+
+    def _stratum_pool(self, buckets: List[Tuple[str, array]], selected_mask: int) -> List[int]:
+        """Positions of a stratum, each question once (from its owner quiz's bucket)"""
+        return [position for quiz_name, positions in buckets for position in positions
+                if self._owner(position, selected_mask) == quiz_name]
+
+    def _sample_stratum(self, buckets: List[Tuple[str, array]], count: int, selected_mask: int,
+                        rnd: random.Random) -> List[int]:
+        total = sum(len(positions) for _, positions in buckets)
+        if count <= 0 or total == 0:
+            return []
+        if count >= total * ENUMERATE_FRACTION:
+            return self._enumerate_stratum(buckets, count, selected_mask, rnd)
+
+        cumulative = []
+        running = 0
+        for _, positions in buckets:
+            running += len(positions)
+            cumulative.append(running)
+
+        chosen = set()
+        drawn = []
+        for _ in range(count * MAX_DRAWS_PER_QUESTION):
+            offset = rnd.randrange(total)
+            slot = bisect.bisect_right(cumulative, offset)
+            quiz_name, positions = buckets[slot]
+            position = positions[offset - (cumulative[slot - 1] if slot else 0)]
+            # Rejecting draws from non-owner quizzes keeps shared questions from being over-weighted
+            if position in chosen or self._owner(position, selected_mask) != quiz_name:
+                continue
+            chosen.add(position)
+            drawn.append(position)
+            if len(drawn) == count:
+                return drawn
+        return self._enumerate_stratum(buckets, count, selected_mask, rnd)
+
+    def _enumerate_stratum(self, buckets: List[Tuple[str, array]], count: int, selected_mask: int,
+                           rnd: random.Random) -> List[int]:
+        pool = self._stratum_pool(buckets, selected_mask)
+        return rnd.sample(pool, min(count, len(pool)))
+
+def _apportion(count: int, weights: Dict[str, int]) -> Dict[str, int]:
+    """Split count over the strata in proportion to their weights (largest remainder method)"""
+    total = sum(weights.values())
+    if total == 0:
+        return {}
+    count = min(count, total)
+    exact = {qtype: count * weight / total for qtype, weight in weights.items()}
+    quotas = {qtype: int(share) for qtype, share in exact.items()}
+    by_remainder = sorted(exact, key=lambda qtype: (quotas[qtype] - exact[qtype], qtype))
+    for qtype in by_remainder[:count - sum(quotas.values())]:
+        quotas[qtype] += 1
+    return quotas
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Draw a random, type-stratified sample of questions')
+    parser.add_argument('--database', default='quiz_database.json', help='database to sample from')
+    parser.add_argument('--count', type=int, default=10, help='number of questions (default: 10)')
+    parser.add_argument('--quiz', action='append', help='restrict to this quiz (repeatable; default: all quizzes)')
+    parser.add_argument('--type', action='append', dest='types', help='restrict to this question type (repeatable)')
+    parser.add_argument('--seed', type=int, help='seed for a reproducible sample')
+    parser.add_argument('--include-invalid', action='store_true', help='also sample questions with validation issues')
+    args = parser.parse_args(argv)
+
+    index = SamplingIndex(load_database(args.database))
+    sample = index.sample(args.count, args.quiz, args.seed, not args.include_invalid, args.types)
+    print(json.dumps(sample, ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,455 @@
+import os
+import json
+import gzip
+import time
+import bisect
+import asyncio
+import hashlib
+import argparse
+import mimetypes
+from stat import S_ISREG
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qs, unquote
+from typing import List, Dict, Any, Optional, Tuple
+from question_index import question_id, DATABASE_FORMAT_VERSION
+from sharded_output import load_database
+from quiz_extractor import extract_html, PARSER_BACKENDS
+from quiz_sampling import SamplingIndex
+from search_index import SearchIndex, DEFAULT_SEARCH_LIMIT
+from question_model import QuestionBank as CompactQuestionBank
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Files of the web app served next to the API
+STATIC_FILES = ('index.html', 'app.js', 'styles.css')
+
+DEFAULT_PORT = 8000
+DEFAULT_MAX_UPLOAD_MB = 20
+DEFAULT_MAX_PENDING = 8
+DEFAULT_RANGE_LIMIT = 100
+MAX_RANGE_LIMIT = 1000
+DEFAULT_SAMPLE_SIZE = 10
+
+# Responses smaller than this are not worth compressing
+GZIP_MIN_SIZE = 1024
+
+# Responses to client-chosen parameters (ID lists, ranges, seeds) kept per database version
+RECENT_RESPONSES = 256
+
+KEEPALIVE_TIMEOUT = 15.0
+RELOAD_CHECK_INTERVAL = 1.0
+
+HTTP_REASONS = {
+    200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    413: 'Payload Too Large', 415: 'Unsupported Media Type', 422: 'Unprocessable Entity',
+    500: 'Internal Server Error', 503: 'Service Unavailable'
+}
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class CachedBody:
+    """A rendered response body with its ETag and a lazily built gzip variant"""
+    __slots__ = ('body', 'etag', 'content_type', '_gzipped')
+
+    def __init__(self, body: bytes, content_type: str = 'application/json; charset=utf-8', etag: Optional[str] = None):
+        self.body = body
+        self.content_type = content_type
+        self.etag = etag or f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        self._gzipped = None
+
+    @classmethod
+    def from_json(cls, data: Any) -> 'CachedBody':
+        return cls(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+    @property
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzipped
+
+class BankSnapshot:
+    """One loaded version of the database: its questions, indexes and rendered responses
+
+    A snapshot is never modified after it is built apart from filling its
+    response cache, so a request that took it keeps answering from one
+    consistent version even if a reload swaps in the next one meanwhile.
+    """
+    __slots__ = ('model', 'sorted_ids', 'sampling', 'search_index', 'stamp', '_responses', '_recent')
+
+    def __init__(self, database: Dict[str, Any], stamp: Optional[Tuple[int, int]] = None):
+        self.model = CompactQuestionBank.from_database(database)
+        self.sorted_ids = sorted(self.model.questions)
+        self.sampling = SamplingIndex(database)
+        self.search_index = SearchIndex.from_database(database)
+        self.stamp = stamp
+        self._responses = {}
+        self._recent = OrderedDict()
+
+    def cached(self, key: Tuple, build) -> CachedBody:
+        """Return the cached response for one of the bank's fixed keys, rendering it with build() on first use"""
+        response = self._responses.get(key)
+        if response is None:
+            response = self._responses[key] = CachedBody.from_json(build())
+        return response
+
+    def cached_recent(self, key: Tuple, build) -> CachedBody:
+        """Like cached(), for keys built from client input: only the RECENT_RESPONSES last used are kept"""
+        response = self._recent.get(key)
+        if response is None:
+            response = self._recent[key] = CachedBody.from_json(build())
+            if len(self._recent) > RECENT_RESPONSES:
+                self._recent.popitem(last=False)
+        else:
+            self._recent.move_to_end(key)
+        return response
+
+    def quiz_list(self) -> Dict[str, Any]:
+        return {
+            'version': self.model.version,
+            'questionCount': len(self.model),
+            'validQuestionCount': self.sampling.valid_count(),
+            'quizzes': [{'name': name, 'count': len(ids)} for name, ids in self.model.quizzes.items()]
+        }
+
+    def quiz(self, quiz_name: str) -> Dict[str, Any]:
+        """Return one quiz in the shard layout: {ids, questions}"""
+        ids = self.model.quizzes.get(quiz_name)
+        if ids is None:
+            raise HTTPError(404, f"Unknown quiz '{quiz_name}'")
+        return {'ids': list(ids), 'questions': self.model.questions_of(ids)}
+
+    def questions_by_ids(self, ids: List[str]) -> Dict[str, Any]:
+        return {'questions': self.model.questions_of(ids)}
+
+    def sample(self, count: int, quizzes: Optional[List[str]], seed: Optional[int], valid_only: bool,
+               types: Optional[List[str]]) -> Dict[str, Any]:
+        """Return a random stratified sample (see SamplingIndex.sample) with its questions"""
+        try:
+            sample = self.sampling.sample(count, quizzes, seed, valid_only, types)
+        except KeyError as e:
+            raise HTTPError(404, f"Unknown quiz {e}")
+        sample['questions'] = self.model.questions_of(sample['ids'])
+        return sample
+
+    def search(self, query: str, limit: int) -> Dict[str, Any]:
+        """Return the best full-text matches (see SearchIndex.search_page) with their questions"""
+        page = self.search_index.search_page(query, limit)
+        page['questions'] = self.model.questions_of(page['ids'])
+        return page
+
+    def id_range(self, start: str, end: Optional[str], limit: int) -> Dict[str, Any]:
+        """Return up to limit questions with start <= id < end in ID order, plus the ID to continue from"""
+        first = bisect.bisect_left(self.sorted_ids, start)
+        last = bisect.bisect_left(self.sorted_ids, end) if end else len(self.sorted_ids)
+        ids = self.sorted_ids[first:min(last, first + limit)]
+        next_id = self.sorted_ids[first + limit] if first + limit < last else None
+        return {'ids': ids, 'questions': self.model.questions_of(ids), 'next': next_id}
+
+class QuestionBank:
+    def __init__(self, database_file: str):
+        """In-memory question bank reloaded whenever the database file changes
+
+        The database, quiz list and quiz responses are rendered once per
+        database version and kept with their ETag and gzip form, so repeated
+        requests from many clients cost a dictionary lookup; responses to
+        client-chosen IDs, ranges and seeds are kept in a small LRU. Between reloads the questions are held in the
+        compact question_model form rather than as parsed JSON dicts.
+        """
+        self.database_file = database_file
+        self.snapshot = BankSnapshot({'version': DATABASE_FORMAT_VERSION, 'questions': {}, 'quizzes': {}})
+        self._failed_stamp = None
+        self._last_check = 0.0
+
+    def reload_if_changed(self) -> bool:
+        """Reload the database when its file changed on disk; returns whether it did
+
+        Runs in a worker thread: the new snapshot is built completely before
+        the single assignment that publishes it, so requests never see a mix
+        of two versions. A file that fails to load (half-written, corrupt, a
+        shard missing) is reported once and the current snapshot keeps being
+        served until the file changes again.
+        """
+        self._last_check = time.monotonic()
+        try:
+            stat = os.stat(self.database_file)
+        except OSError:
+            return False
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp in (self.snapshot.stamp, self._failed_stamp):
+            return False
+        try:
+            snapshot = BankSnapshot(load_database(self.database_file), stamp)
+        except Exception as e:
+            self._failed_stamp = stamp
+            print(f"⚠️  Could not reload {self.database_file}, still serving the previous version: "
+                  f"{type(e).__name__}: {e}")
+            return False
+        self.snapshot = snapshot
+        self._failed_stamp = None
+        return True
+
+    def needs_check(self) -> bool:
+        return time.monotonic() - self._last_check >= RELOAD_CHECK_INTERVAL
+
+class QuizServer:
+    def __init__(self, bank: QuestionBank, executor: ProcessPoolExecutor, parser: str = 'lxml',
+                 max_pending: int = DEFAULT_MAX_PENDING, max_upload: int = DEFAULT_MAX_UPLOAD_MB << 20,
+                 static_dir: str = APP_DIR, shard_dir: Optional[str] = None):
+        """HTTP front end for the question bank, the web app and page uploads
+
+        Uploaded pages are extracted in the process pool; at most max_pending
+        uploads are accepted at once and further ones get 503 instead of
+        queueing without bound.
+        """
+        self.bank = bank
+        self.executor = executor
+        self.parser = parser
+        self.max_upload = max_upload
+        self.static_dir = static_dir
+        self.shard_dir = shard_dir
+        self.upload_slots = asyncio.Semaphore(max_pending)
+        self._static = {}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one connection, keeping it open for HTTP/1.1 clients"""
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = await self._read_headers(reader)
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+                length = int(headers.get('content-length') or 0)
+                if length > self.max_upload:
+                    await self._send(writer, *self._error(413, f"Upload larger than {self.max_upload >> 20} MB"),
+                                     keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                status, response_headers, payload = await self.dispatch(method, target, headers, body)
+                await self._send(writer, status, response_headers, b'' if method == 'HEAD' else payload,
+                                 keep_alive, len(payload))
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                return headers
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, status: int, headers: Dict[str, str], payload: bytes,
+                    keep_alive: bool = True, content_length: Optional[int] = None):
+        lines = [f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}"]
+        headers['Content-Length'] = str(len(payload) if content_length is None else content_length)
+        headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload)
+        await writer.drain()
+
+    async def dispatch(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        """Route a request and return (status, headers, payload)"""
+        url = urlsplit(target)
+        path = unquote(url.path)
+        query = parse_qs(url.query)
+        try:
+            if self.bank.needs_check():
+                await asyncio.to_thread(self.bank.reload_if_changed)
+            if path == '/api/extract':
+                if method != 'POST':
+                    raise HTTPError(405, 'Use POST with the attempt page as the request body')
+                return await self.extract_upload(headers, body)
+            if method not in ('GET', 'HEAD'):
+                raise HTTPError(405, f"{method} is not supported on {path}")
+            return self._cached_response(headers, self.route_get(path, query))
+        except HTTPError as e:
+            return self._error(e.status, str(e))
+        except Exception as e:
+            return self._error(500, f"{type(e).__name__}: {e}")
+
+    def route_get(self, path: str, query: Dict[str, List[str]]) -> CachedBody:
+        snapshot = self.bank.snapshot
+        if path in ('/quiz_database.json', '/api/database'):
+            return snapshot.cached(('database',), snapshot.model.to_database)
+        if path == '/api/quizzes':
+            return snapshot.cached(('quizzes',), snapshot.quiz_list)
+        if path.startswith('/api/quizzes/'):
+            quiz_name = path[len('/api/quizzes/'):]
+            return snapshot.cached(('quiz', quiz_name), lambda: snapshot.quiz(quiz_name))
+        if path == '/api/questions':
+            return self._questions_response(query)
+        if path == '/api/sample':
+            return self._sample_response(query)
+        if path == '/api/search':
+            return self._search_response(query)
+        return self._static_file(path)
+
+    def _questions_response(self, query: Dict[str, List[str]]) -> CachedBody:
+        """?ids=a,b,c selects questions by ID; ?start=&end=&limit= pages through the ID range"""
+        snapshot = self.bank.snapshot
+        if 'ids' in query:
+            ids = tuple(qid for value in query['ids'] for qid in value.split(',') if qid)
+            return snapshot.cached_recent(('ids', ids), lambda: snapshot.questions_by_ids(list(ids)))
+        start = query.get('start', [''])[0]
+        end = query.get('end', [''])[0] or None
+        try:
+            limit = int(query.get('limit', [DEFAULT_RANGE_LIMIT])[0])
+        except ValueError:
+            raise HTTPError(400, 'limit must be an integer')
+        limit = max(1, min(limit, MAX_RANGE_LIMIT))
+        return snapshot.cached_recent(('range', start, end, limit), lambda: snapshot.id_range(start, end, limit))
+
+    def _sample_response(self, query: Dict[str, List[str]]) -> CachedBody:
+        """?count=N&quiz=A&quiz=B&type=single&seed=S&valid=all draws a random quiz
+
+        Seeded samples are deterministic, so the most recent ones are cached.
+        """
+        snapshot = self.bank.snapshot
+        try:
+            count = int(query.get('count', [DEFAULT_SAMPLE_SIZE])[0])
+            seed = int(query['seed'][0]) if 'seed' in query else None
+        except ValueError:
+            raise HTTPError(400, 'count and seed must be integers')
+        count = max(0, min(count, MAX_RANGE_LIMIT))
+        quizzes = query.get('quiz')
+        types = query.get('type')
+        valid_only = query.get('valid', ['only'])[0] != 'all'
+        if seed is None:
+            return CachedBody.from_json(snapshot.sample(count, quizzes, seed, valid_only, types))
+        key = ('sample', count, tuple(quizzes or ()), seed, valid_only, tuple(types or ()))
+        return snapshot.cached_recent(key, lambda: snapshot.sample(count, quizzes, seed, valid_only, types))
+
+    def _search_response(self, query: Dict[str, List[str]]) -> CachedBody:
+        """?q=words&limit=N searches question and option text; the last word may be a prefix
+
+        Free-text queries are too varied to be worth caching.
+        """
+        try:
+            limit = int(query.get('limit', [DEFAULT_SEARCH_LIMIT])[0])
+        except ValueError:
+            raise HTTPError(400, 'limit must be an integer')
+        limit = max(1, min(limit, MAX_RANGE_LIMIT))
+        return CachedBody.from_json(self.bank.snapshot.search(query.get('q', [''])[0], limit))
+
+    def _static_file(self, path: str) -> CachedBody:
+        """Serve the web app files and, when configured, the quiz_db shards"""
+        if path == '/':
+            path = '/index.html'
+        relative = path.lstrip('/')
+        if relative in STATIC_FILES:
+            file_path = os.path.join(self.static_dir, relative)
+        elif self.shard_dir and relative.startswith('quiz_db/') and self._is_shard_name(relative[len('quiz_db/'):]):
+            file_path = os.path.join(self.shard_dir, relative[len('quiz_db/'):])
+        else:
+            raise HTTPError(404, f"Not found: {path}")
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            raise HTTPError(404, f"Not found: {path}")
+        if not S_ISREG(stat.st_mode):
+            raise HTTPError(404, f"Not found: {path}")
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = self._static.get(file_path)
+        if cached is None or cached[0] != stamp:
+            with open(file_path, 'rb') as f:
+                content_type = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+                if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+                    content_type += '; charset=utf-8'
+                cached = self._static[file_path] = (stamp, CachedBody(f.read(), content_type))
+        return cached[1]
+
+    @staticmethod
+    def _is_shard_name(name: str) -> bool:
+        """Whether name can only refer to a file directly inside the shard folder"""
+        return name not in ('', '.', '..') and '/' not in name and os.sep not in name
+
+    def _cached_response(self, headers: Dict[str, str], cached: CachedBody) -> Tuple[int, Dict[str, str], bytes]:
+        """Answer with 304 when the client's ETag matches, gzip when accepted and worthwhile"""
+        response_headers = {
+            'Content-Type': cached.content_type,
+            'ETag': cached.etag,
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding'
+        }
+        if cached.etag in (tag.strip() for tag in headers.get('if-none-match', '').split(',')):
+            return 304, response_headers, b''
+        if 'gzip' in headers.get('accept-encoding', '') and len(cached.body) >= GZIP_MIN_SIZE:
+            response_headers['Content-Encoding'] = 'gzip'
+            return 200, response_headers, cached.gzipped
+        return 200, response_headers, cached.body
+
+    async def extract_upload(self, headers: Dict[str, str], body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        """Extract the questions of an uploaded attempt page in the worker pool"""
+        if not body:
+            raise HTTPError(400, 'Empty upload')
+        content_type = headers.get('content-type', 'text/html')
+        if not content_type.startswith(('text/html', 'application/xhtml', 'application/octet-stream', 'text/plain')):
+            raise HTTPError(415, 'Upload the attempt page as text/html')
+        try:
+            content = body.decode('utf-8')
+        except UnicodeDecodeError:
+            raise HTTPError(400, 'The page must be UTF-8 encoded')
+        if self.upload_slots.locked():
+            raise HTTPError(503, 'Too many uploads in progress, retry shortly')
+        async with self.upload_slots:
+            questions = await asyncio.get_running_loop().run_in_executor(self.executor, extract_html, content, self.parser)
+        if not questions:
+            raise HTTPError(422, 'No questions found in the uploaded page')
+        for q in questions:
+            q['id'] = question_id(q)
+        return 200, {'Content-Type': 'application/json; charset=utf-8'}, CachedBody.from_json({'questions': questions}).body
+
+    @staticmethod
+    def _error(status: int, message: str) -> Tuple[int, Dict[str, str], bytes]:
+        return status, {'Content-Type': 'application/json; charset=utf-8'}, CachedBody.from_json({'error': message}).body
+
+async def serve(args: argparse.Namespace):
+    bank = QuestionBank(args.database)
+    if not bank.reload_if_changed() and not os.path.exists(args.database):
+        print(f"⚠️  {args.database} not found yet; serving an empty bank until it appears")
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        quiz_server = QuizServer(bank, executor, args.parser, args.max_pending, args.max_upload << 20,
+                                 shard_dir=args.shard_dir if os.path.isdir(args.shard_dir) else None)
+        server = await asyncio.start_server(quiz_server.handle_connection, args.host, args.port)
+        print(f"🌐 Serving {len(bank.snapshot.model)} questions from {args.database} "
+              f"on http://{args.host}:{args.port}/ ({workers} extraction workers)")
+        async with server:
+            await server.serve_forever()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Serve the quiz app, the question bank API and page extraction')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--database', default='quiz_database.json',
+                        help='indexed or legacy database, or a quiz_db/manifest.json (default: quiz_database.json)')
+    parser.add_argument('--shard-dir', default='quiz_db', help='shard directory served under /quiz_db/ (default: quiz_db)')
+    parser.add_argument('--workers', type=int, default=2, help='upload extraction processes (0 = one per CPU, default: 2)')
+    parser.add_argument('--max-pending', type=int, default=DEFAULT_MAX_PENDING,
+                        help=f'uploads extracted at once before new ones get 503 (default: {DEFAULT_MAX_PENDING})')
+    parser.add_argument('--max-upload', type=int, default=DEFAULT_MAX_UPLOAD_MB,
+                        help=f'largest accepted upload in MB (default: {DEFAULT_MAX_UPLOAD_MB})')
+    parser.add_argument('--parser', choices=PARSER_BACKENDS, default='lxml', help='HTML parser backend for uploads')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped")
+
+if __name__ == '__main__':
+    main()
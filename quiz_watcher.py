@@ -0,0 +1,211 @@
+import os
+import re
+import time
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple
+from extraction_cache import ExtractionCache
+from instrumentation import ExtractionMetrics, configure_logging
+from quiz_extractor import (EXTRACTOR_VERSION, build_arg_parser, find_base_dir, find_quiz_dirs, list_html_files,
+                            build_quiz_database, publish_database)
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # Optional: without watchdog the quiz folders are polled
+    Observer = None
+
+DEFAULT_DEBOUNCE = 2.0
+DEFAULT_MAX_DELAY = 30.0
+DEFAULT_POLL_INTERVAL = 1.0
+
+QUIZ_DIR_PATTERN = re.compile(r'^Quiz \d+$')
+
+# watchdog also reports opens and read-only closes, which every rebuild causes itself
+CONTENT_EVENT_TYPES = frozenset(['created', 'modified', 'moved', 'deleted', 'closed'])
+
+def snapshot_quiz_files(base_dir: str) -> Dict[str, Tuple[int, int]]:
+    """Return (mtime, size) of every HTML file in the quiz directories"""
+    snapshot = {}
+    for quiz_dir in find_quiz_dirs(base_dir):
+        quiz_path = os.path.join(base_dir, quiz_dir)
+        for file_name in list_html_files(quiz_path):
+            file_path = os.path.join(quiz_path, file_name)
+            try:
+                stat = os.stat(file_path)
+            except OSError:  # Removed while scanning; the next snapshot settles it
+                continue
+            snapshot[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+class PollingChangeSource:
+    def __init__(self, base_dir: str, interval: float = DEFAULT_POLL_INTERVAL):
+        """Detect changes by comparing snapshots of the quiz directories every interval seconds"""
+        self.base_dir = base_dir
+        self.interval = interval
+        self.snapshot = snapshot_quiz_files(base_dir)
+
+    def wait(self, timeout: float) -> bool:
+        """Block for up to timeout seconds and return whether any quiz HTML file changed"""
+        deadline = time.monotonic() + timeout
+        while True:
+            current = snapshot_quiz_files(self.base_dir)
+            if current != self.snapshot:
+                self.snapshot = current
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+class InotifyChangeSource:
+    def __init__(self, base_dir: str):
+        """Detect changes from filesystem events (inotify on Linux) through watchdog"""
+        self.changed = threading.Event()
+        handler = FileSystemEventHandler()
+        handler.on_any_event = self._on_event
+        self.observer = Observer()
+        self.observer.schedule(handler, base_dir, recursive=True)
+        self.observer.start()
+
+    def _on_event(self, event):
+        # Only HTML drops and Quiz N folders matter; the published database and
+        # cache live next to them and must not retrigger a rebuild
+        if event.event_type not in CONTENT_EVENT_TYPES:
+            return
+        for path in (event.src_path, getattr(event, 'dest_path', '')):
+            if path.endswith('.html') or QUIZ_DIR_PATTERN.match(os.path.basename(path)):
+                self.changed.set()
+                return
+
+    def wait(self, timeout: float) -> bool:
+        """Block for up to timeout seconds and return whether any quiz HTML file changed"""
+        if self.changed.wait(timeout):
+            self.changed.clear()
+            return True
+        return False
+
+    def close(self):
+        self.observer.stop()
+        self.observer.join()
+
+def open_change_source(base_dir: str, poll: bool = False, interval: float = DEFAULT_POLL_INTERVAL):
+    """Return an inotify-backed change source when watchdog is available, else a polling one"""
+    if not poll and Observer is not None:
+        try:
+            return InotifyChangeSource(base_dir)
+        except OSError as e:  # e.g. inotify watch limit reached
+            print(f"⚠️  File events unavailable ({e}), falling back to polling")
+    return PollingChangeSource(base_dir, interval)
+
+class QuizWatcher:
+    def __init__(self, base_dir: str, args, workers: int = 1):
+        """Republish the quiz database whenever the Quiz N folders change
+
+        The extraction cache stays in memory between rebuilds, so a rebuild
+        only parses the files whose content changed, and with several workers
+        one process pool is kept warm for the whole session.
+        """
+        self.base_dir = base_dir
+        self.args = args
+        self.workers = workers
+        self.cache = ExtractionCache(args.cache, EXTRACTOR_VERSION)
+        if not args.no_cache:
+            self.cache.load()
+        self.executor = None
+        if workers > 1:
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_ignore_stop_signals)
+        self.rebuilds = 0
+
+    def rebuild(self) -> Optional[str]:
+        """Re-extract changed files and atomically republish the database; returns the published file"""
+        start = time.perf_counter()
+        metrics = ExtractionMetrics()
+        self.cache.reset_stats()
+        quiz_dirs = find_quiz_dirs(self.base_dir)
+        all_quiz_data = build_quiz_database(self.base_dir, quiz_dirs, self.workers, self.cache, self.args.parser,
+                                            self.args.stream, self.args.dedup, self.args.similarity, metrics,
+                                            self.executor)
+        if not self.args.no_cache:
+            self.cache.save()
+        output_file, report = publish_database(all_quiz_data, self.args, metrics)
+        if self.args.metrics:
+            metrics.write(self.args.metrics, self.args.metrics_format)
+        self.rebuilds += 1
+
+        total = sum(len(questions) for questions in all_quiz_data.values())
+        print(f"\n🔁 Published {output_file}: {total} questions from {len(quiz_dirs)} quizzes "
+              f"({len(report.invalid_ids)} invalid), {self.cache.misses} files re-extracted "
+              f"in {time.perf_counter() - start:.2f}s")
+        return output_file
+
+    def run(self, source, debounce: float = DEFAULT_DEBOUNCE, max_delay: float = DEFAULT_MAX_DELAY):
+        """Publish once, then rebuild after every burst of changes until interrupted
+
+        A burst ends once no change has been seen for debounce seconds, or
+        after max_delay seconds so a steady stream of drops still gets published.
+        """
+        self._safe_rebuild()
+        print(f"\n👀 Watching {os.path.abspath(self.base_dir)} for new attempt pages (Ctrl+C to stop)")
+        while True:
+            if not source.wait(1.0):
+                continue
+            deadline = time.monotonic() + max_delay
+            while time.monotonic() < deadline and source.wait(min(debounce, max(0.0, deadline - time.monotonic()))):
+                pass
+            self._safe_rebuild()
+
+    def _safe_rebuild(self):
+        # A bad drop must not take the daemon down; the last good database stays published
+        try:
+            self.rebuild()
+        except Exception as e:
+            print(f"❌ Rebuild failed, keeping the previous database: {e}")
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+def _ignore_stop_signals():
+    # Ctrl+C and SIGTERM reach the whole process group; the watcher shuts its pool down itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+def main(argv: Optional[List[str]] = None):
+    parser = build_arg_parser('Watch the Quiz N folders and republish the quiz database when attempt pages change')
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE,
+                        help=f'seconds without changes before rebuilding (default: {DEFAULT_DEBOUNCE})')
+    parser.add_argument('--max-delay', type=float, default=DEFAULT_MAX_DELAY,
+                        help=f'rebuild at the latest this many seconds into a burst (default: {DEFAULT_MAX_DELAY})')
+    parser.add_argument('--poll', action='store_true', help='poll the folders even when watchdog is installed')
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help=f'seconds between polls (default: {DEFAULT_POLL_INTERVAL})')
+    args = parser.parse_args(argv)
+
+    configure_logging(args.verbose)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    base_dir = find_base_dir()
+
+    # Stop cleanly under service managers, which send SIGTERM
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+
+    watcher = QuizWatcher(base_dir, args, workers)
+    source = open_change_source(base_dir, args.poll, args.poll_interval)
+    print(f"📡 Change detection: {'inotify (watchdog)' if isinstance(source, InotifyChangeSource) else 'polling'}")
+    try:
+        watcher.run(source, args.debounce, args.max_delay)
+    except KeyboardInterrupt:
+        print(f"\n👋 Stopped after {watcher.rebuilds} rebuilds")
+    finally:
+        source.close()
+        watcher.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+import os
+import json
+import math
+import heapq
+import time
+import bisect
+import argparse
+from array import array
+from operator import itemgetter
+from itertools import accumulate
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+from text_normalizer import fold_text
+from sharded_output import load_database, write_with_compression
+
+# Version of the compact search index layout written by build_search_index
+SEARCH_INDEX_VERSION = 1
+
+SEARCH_INDEX_FILE = 'search_index.json'
+
+DEFAULT_SEARCH_LIMIT = 20
+
+# Okapi BM25 parameters: term frequency saturation and document length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# The last query token also matches longer terms once it has this many characters,
+# expanding to at most this many of them
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_TERMS = 64
+
+# Below one candidate per this many postings, candidates are binary-searched
+# in a term's postings instead of scanning them
+SPARSE_PROBE_FACTOR = 16
+
+def tokenize(text: str) -> List[str]:
+    """Split text into diacritic-folded search tokens ('Điện toán' -> ['dien', 'toan'])"""
+    return fold_text(text).split()
+
+def question_tokens(q: Dict[str, Any]) -> List[str]:
+    """Return the tokens of a question's text followed by those of its options"""
+    tokens = tokenize(q.get('question', ''))
+    for option in q.get('options', []):
+        tokens.extend(tokenize(option['text']))
+    return tokens
+
+def build_search_index(database: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the compact inverted index of an indexed database
+
+    Questions are numbered by their position in 'ids' (sorted question IDs).
+    Each term maps to a flat [doc gap, tf, doc gap, tf, ...] list where a gap
+    is the difference to the previous document number, so the minified JSON
+    stays small and a client decodes it with a single pass. 'quiz' holds the
+    first quiz containing each question, which tells a client without the
+    full database which shard to load for a hit.
+    """
+    ids = sorted(database['questions'])
+    quiz_names = list(database['quizzes'])
+    first_quiz = {}
+    for quiz_number, quiz_name in enumerate(quiz_names):
+        for qid in database['quizzes'][quiz_name]:
+            first_quiz.setdefault(qid, quiz_number)
+
+    postings = {}
+    lengths = []
+    for doc, qid in enumerate(ids):
+        tokens = question_tokens(database['questions'][qid])
+        lengths.append(len(tokens))
+        for term, tf in Counter(tokens).items():
+            entry = postings.get(term)
+            if entry is None:
+                postings[term] = [doc, tf, doc]
+            else:
+                entry[-1:] = [doc - entry[-1], tf, doc]
+
+    return {
+        'version': SEARCH_INDEX_VERSION,
+        'ids': ids,
+        'quizzes': quiz_names,
+        'quiz': [first_quiz.get(qid, 0) for qid in ids],
+        'lengths': lengths,
+        # The trailing element only tracked the last document number while building
+        'terms': {term: entry[:-1] for term, entry in sorted(postings.items())}
+    }
+
+def write_search_index(database: Dict[str, Any], path: str, compress: Iterable[str] = ()) -> Dict[str, int]:
+    """Write the minified search index of a database (plus precompressed copies); returns their sizes"""
+    index = build_search_index(database)
+    payload = json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return write_with_compression(path, payload, compress)
+
+class SearchIndex:
+    def __init__(self, data: Dict[str, Any]):
+        """Query API over a compact index from build_search_index
+
+        Postings are decoded once into typed arrays of document numbers and
+        term frequencies. The BM25 contribution of each posting depends only
+        on the term and the document, so it is computed the first time a term
+        is queried and kept; a query then merges precomputed impacts, rarest
+        term first, which keeps searches over tens of thousands of questions
+        in the millisecond range.
+        """
+        if data.get('version') != SEARCH_INDEX_VERSION:
+            raise ValueError(f"Unsupported search index version {data.get('version')}")
+        self.ids = data['ids']
+        self.quiz_names = data['quizzes']
+        self.quiz = data['quiz']
+        self.terms = sorted(data['terms'])
+        self.postings = {term: (array('I', accumulate(flat[0::2])), array('I', flat[1::2]))
+                         for term, flat in data['terms'].items()}
+        lengths = data['lengths']
+        # Falls back to 1.0 when no document has any tokens (an empty or all-stopword bank)
+        average_length = sum(lengths) / (len(lengths) or 1) or 1.0
+        self.norms = array('d', (BM25_K1 * (1 - BM25_B + BM25_B * length / average_length) for length in lengths))
+        self._impacts = {}
+
+    @classmethod
+    def from_database(cls, database: Dict[str, Any]) -> 'SearchIndex':
+        return cls(build_search_index(database))
+
+    @classmethod
+    def load(cls, path: str) -> 'SearchIndex':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def expand_prefix(self, prefix: str) -> List[str]:
+        """Return up to MAX_PREFIX_TERMS indexed terms starting with prefix, shortest first"""
+        if len(prefix) < MIN_PREFIX_LENGTH:
+            return [prefix] if prefix in self.postings else []
+        start = bisect.bisect_left(self.terms, prefix)
+        end = start
+        while end < len(self.terms) and end - start < MAX_PREFIX_TERMS and self.terms[end].startswith(prefix):
+            end += 1
+        return self.terms[start:end]
+
+    def impacts(self, term: str) -> array:
+        """Return the BM25 score contribution of term in each document of its postings"""
+        impacts = self._impacts.get(term)
+        if impacts is None:
+            docs, tfs = self.postings[term]
+            df = len(docs)
+            idf = math.log(1 + (len(self.ids) - df + 0.5) / (df + 0.5))
+            norms = self.norms
+            impacts = self._impacts[term] = array('d', (idf * tf * (BM25_K1 + 1) / (tf + norms[doc])
+                                                        for doc, tf in zip(docs, tfs)))
+        return impacts
+
+    def _token_scores(self, terms: List[str], candidates: Optional[Dict[int, float]]) -> Dict[int, float]:
+        """Scores of the documents holding any of terms, optionally only among candidates
+
+        A prefix expanded into several terms scores each document by its best completion.
+        """
+        scores = {}
+        for term in terms:
+            docs = self.postings[term][0]
+            impacts = self.impacts(term)
+            if candidates is not None and len(candidates) * SPARSE_PROBE_FACTOR < len(docs):
+                # Few candidates left: binary search them in the long postings list
+                pairs = []
+                for doc in candidates:
+                    i = bisect.bisect_left(docs, doc)
+                    if i < len(docs) and docs[i] == doc:
+                        pairs.append((doc, impacts[i]))
+            else:
+                pairs = zip(docs, impacts)
+            if len(terms) == 1:
+                return dict(pairs)
+            for doc, impact in pairs:
+                if impact > scores.get(doc, 0.0):
+                    scores[doc] = impact
+        return scores
+
+    def match(self, query: str, prefix: bool = True) -> Dict[int, float]:
+        """Return the BM25 score of every question containing all query tokens
+
+        With prefix=True the last token also matches longer terms, so partial
+        input such as 'hyperv' already finds 'hypervisor'.
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        alternatives = []
+        for position, token in enumerate(tokens):
+            if prefix and position == len(tokens) - 1:
+                terms = self.expand_prefix(token)
+            else:
+                terms = [token] if token in self.postings else []
+            if not terms:
+                return {}
+            alternatives.append(terms)
+
+        # Rarest token first: its postings seed the candidates and every
+        # further token can only narrow them down
+        alternatives.sort(key=lambda terms: sum(len(self.postings[term][0]) for term in terms))
+        scores = None
+        for terms in alternatives:
+            token_scores = self._token_scores(terms, scores)
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {doc: score + token_scores[doc] for doc, score in scores.items() if doc in token_scores}
+            if not scores:
+                break
+        return scores or {}
+
+    def _best(self, scores: Dict[int, float], limit: int) -> List[Tuple[str, float]]:
+        best = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+        return [(self.ids[doc], score) for doc, score in best]
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT, prefix: bool = True) -> List[Tuple[str, float]]:
+        """Return up to limit (question ID, score) pairs, best match first"""
+        return self._best(self.match(query, prefix), limit)
+
+    def search_page(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> Dict[str, Any]:
+        """Return {'query', 'total', 'ids', 'scores'} for the best limit matches"""
+        scores = self.match(query)
+        best = self._best(scores, limit)
+        return {
+            'query': query,
+            'total': len(scores),
+            'ids': [qid for qid, _ in best],
+            'scores': [round(score, 4) for _, score in best]
+        }
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Search the question bank, or (re)build its search index')
+    parser.add_argument('query', nargs='*', help='words to search for (all must match; the last may be a prefix)')
+    parser.add_argument('--database', default='quiz_database.json',
+                        help='indexed or legacy database, or a quiz_db/manifest.json (default: quiz_database.json)')
+    parser.add_argument('--index', help=f'search index to query or write (default: {SEARCH_INDEX_FILE} next to the database)')
+    parser.add_argument('--build', action='store_true', help='rebuild the search index from the database first')
+    parser.add_argument('--limit', type=int, default=DEFAULT_SEARCH_LIMIT,
+                        help=f'number of results (default: {DEFAULT_SEARCH_LIMIT})')
+    args = parser.parse_args(argv)
+
+    index_file = args.index or os.path.join(os.path.dirname(args.database), SEARCH_INDEX_FILE)
+    database = load_database(args.database)
+    if args.build or not os.path.exists(index_file):
+        sizes = write_search_index(database, index_file)
+        print(f"🔎 Indexed {len(database['questions'])} questions into {index_file} ({sizes['json'] / 1024:.1f} KB)")
+    if not args.query:
+        return
+
+    search_index = SearchIndex.load(index_file)
+    start = time.perf_counter()
+    page = search_index.search_page(' '.join(args.query), args.limit)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"🔎 {page['total']} questions match '{page['query']}' ({elapsed:.1f} ms)")
+    for qid, score in zip(page['ids'], page['scores']):
+        q = database['questions'].get(qid, {})
+        print(f"   {qid}  {score:6.2f}  {q.get('question', '')[:100]}")
+
+if __name__ == '__main__':
+    main()
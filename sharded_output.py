@@ -0,0 +1,147 @@
+import os
+import re
+import json
+import gzip
+from typing import List, Dict, Any, Iterable, Set
+from question_index import build_indexed_database, DATABASE_FORMAT_VERSION
+
+try:
+    import brotli
+except ImportError:  # Optional: only needed for --compress br
+    brotli = None
+
+MANIFEST_FILE = 'manifest.json'
+COMPRESSIONS = ('gzip', 'br')
+
+# Files written into the shard folder besides the shards (search_index.SEARCH_INDEX_FILE imports this module)
+RESERVED_FILES = (MANIFEST_FILE, 'search_index.json')
+
+def shard_file_name(quiz_name: str) -> str:
+    """Return the shard file name for a quiz, e.g. 'Quiz 10' -> 'quiz-10.json'"""
+    slug = re.sub(r'[^a-z0-9]+', '-', quiz_name.lower()).strip('-')
+    return f"{slug or 'quiz'}.json"
+
+def shard_file_names(quiz_names: Iterable[str]) -> Dict[str, str]:
+    """Map each quiz to a distinct shard file name; quizzes whose names slug alike get -2, -3, ... in order"""
+    used = set(RESERVED_FILES)
+    names = {}
+    for quiz_name in quiz_names:
+        stem = shard_file_name(quiz_name)[:-len('.json')]
+        file_name, n = f"{stem}.json", 1
+        while file_name in used:
+            n += 1
+            file_name = f"{stem}-{n}.json"
+        used.add(file_name)
+        names[quiz_name] = file_name
+    return names
+
+def _dumps_minified(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def write_atomic(path: str, payload: bytes):
+    """Replace a file in one step, so readers see the old or the new content but never a partial write"""
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def write_with_compression(path: str, payload: bytes, compress: Iterable[str]) -> Dict[str, int]:
+    """Write a file plus its precompressed siblings and return their sizes"""
+    sizes = {'json': len(payload)}
+    write_atomic(path, payload)
+    if 'gzip' in compress:
+        # mtime=0 keeps the .gz byte-identical between rebuilds of the same data
+        compressed = gzip.compress(payload, compresslevel=9, mtime=0)
+        write_atomic(f"{path}.gz", compressed)
+        sizes['gzip'] = len(compressed)
+    if 'br' in compress:
+        compressed = brotli.compress(payload, quality=11)
+        write_atomic(f"{path}.br", compressed)
+        sizes['br'] = len(compressed)
+    return sizes
+
+def _previous_shard_files(out_dir: str) -> Set[str]:
+    """Shard file names listed by the manifest currently in out_dir, if any"""
+    try:
+        with open(os.path.join(out_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            quizzes = json.load(f).get('quizzes', {})
+        files = {entry['file'] for entry in quizzes.values()}
+    except (OSError, ValueError, AttributeError, KeyError, TypeError):
+        return set()
+    # Only bare names inside out_dir, whatever a hand-edited manifest says
+    return {name for name in files if isinstance(name, str) and name == os.path.basename(name) and name not in ('', '.', '..')}
+
+def write_sharded_database(database: Dict[str, Any], out_dir: str, compress: Iterable[str] = ('gzip',)) -> Dict[str, Any]:
+    """Write a manifest plus one minified, self-contained shard per quiz
+
+    Each shard holds the IDs of its quiz in order and the questions they refer
+    to, so the app only downloads the quizzes a user opens. The manifest is
+    written last and atomically, so a reader never sees it pointing at missing
+    shards. Only then are the shards of quizzes that no longer exist removed:
+    files the previous manifest listed and the new one does not (with their
+    precompressed copies). Nothing else in out_dir is touched.
+    Returns the manifest.
+    """
+    if 'quizzes' not in database:
+        database = build_indexed_database(database)
+    compress = list(compress)
+    if 'br' in compress and brotli is None:
+        print("⚠️  brotli is not installed, skipping .br shards (pip install brotli)")
+        compress.remove('br')
+    os.makedirs(out_dir, exist_ok=True)
+    previous_files = _previous_shard_files(out_dir)
+
+    manifest = {
+        'version': DATABASE_FORMAT_VERSION,
+        'questionCount': len(database['questions']),
+        'quizzes': {}
+    }
+    file_names = shard_file_names(database['quizzes'])
+    for quiz_name, ids in database['quizzes'].items():
+        shard = {
+            'ids': ids,
+            'questions': {qid: database['questions'][qid] for qid in ids}
+        }
+        file_name = file_names[quiz_name]
+        sizes = write_with_compression(os.path.join(out_dir, file_name), _dumps_minified(shard), compress)
+        manifest['quizzes'][quiz_name] = {
+            'file': file_name,
+            'count': len(ids),
+            'bytes': sizes
+        }
+
+    write_atomic(os.path.join(out_dir, MANIFEST_FILE), _dumps_minified(manifest))
+
+    # Drop shards of quizzes that no longer exist
+    current = {entry['file'] for entry in manifest['quizzes'].values()}
+    for file_name in previous_files - current - set(RESERVED_FILES):
+        for stale in (file_name, f"{file_name}.gz", f"{file_name}.br"):
+            try:
+                os.remove(os.path.join(out_dir, stale))
+            except FileNotFoundError:
+                pass
+    return manifest
+
+def load_database(database_file: str) -> Dict[str, Any]:
+    """Load an indexed, legacy or sharded (manifest.json) database as the indexed layout"""
+    with open(database_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if os.path.basename(database_file) == MANIFEST_FILE:
+        shard_dir = os.path.dirname(database_file)
+        database = {'version': data.get('version', DATABASE_FORMAT_VERSION), 'questions': {}, 'quizzes': {}}
+        for quiz_name, entry in data['quizzes'].items():
+            with open(os.path.join(shard_dir, entry['file']), 'r', encoding='utf-8') as f:
+                shard = json.load(f)
+            database['questions'].update(shard['questions'])
+            database['quizzes'][quiz_name] = shard['ids']
+        return database
+    if 'quizzes' not in data:
+        return build_indexed_database(data)
+    return data
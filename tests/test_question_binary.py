@@ -0,0 +1,95 @@
+"""Round trips through the binary question bank.
+
+Run from the repository root with: python -m pytest tests (or python -m unittest discover tests)
+"""
+import os
+import sys
+import random
+import tempfile
+import unittest
+from typing import Dict, Any
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Appended: some benchmarks share their name with the module they measure
+sys.path.append(os.path.join(ROOT, 'benchmarks'))
+
+from question_binary import BinaryQuestionBank, write_binary_database, verify_binary_database
+from question_index import build_indexed_database, DATABASE_FORMAT_VERSION
+from quiz_extractor import build_quiz_database, find_quiz_dirs
+from sharded_output import load_database
+from synthetic_pages import generate_corpus
+
+class BinaryRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_dir = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, database: Dict[str, Any]) -> str:
+        path = os.path.join(self.tmp_dir, 'bank.qbank')
+        write_binary_database(database, path)
+        return path
+
+    def assert_round_trip(self, database: Dict[str, Any]):
+        path = self.write(database)
+        with BinaryQuestionBank(path) as bank:
+            self.assertEqual(len(bank), len(database['questions']))
+            self.assertEqual(list(bank), list(database['questions']))
+            for qid, q in database['questions'].items():
+                self.assertIn(qid, bank)
+                self.assertEqual(bank.question(qid), q)
+            self.assertEqual(bank.questions_of(list(database['questions'])), database['questions'])
+            self.assertEqual(bank.quiz_names, list(database['quizzes']))
+            for quiz_name, ids in database['quizzes'].items():
+                self.assertEqual(bank.quiz_ids(quiz_name), ids)
+            self.assertEqual(bank.to_database(), database)
+        self.assertEqual(verify_binary_database(database, path), [])
+
+    def test_repository_database(self):
+        database = load_database(os.path.join(ROOT, 'quiz_database.json'))
+        self.assertTrue(database['questions'])
+        self.assert_round_trip(database)
+
+    def test_extractor_output(self):
+        pages_dir = os.path.join(self.tmp_dir, 'pages')
+        generate_corpus(pages_dir, quizzes=2, files=3, questions=12, seed=7)
+        all_quiz_data = build_quiz_database(pages_dir, find_quiz_dirs(pages_dir))
+        database = build_indexed_database(all_quiz_data)
+        self.assertEqual(len(database['quizzes']), 2)
+        self.assert_round_trip(database)
+
+    def test_missing_ids(self):
+        database = load_database(os.path.join(ROOT, 'quiz_database.json'))
+        path = self.write(database)
+        known = next(iter(database['questions']))
+        missing = [
+            '0' * len(known),
+            'f' * len(known),
+            known[:-1],
+            known + '0',
+            '',
+            ''.join(random.Random(1).choice('0123456789abcdef') for _ in known)
+        ]
+        missing = [qid for qid in missing if qid not in database['questions']]
+        with BinaryQuestionBank(path) as bank:
+            for qid in missing:
+                self.assertNotIn(qid, bank)
+                with self.assertRaises(KeyError):
+                    bank.question(qid)
+            self.assertEqual(bank.questions_of(missing + [known]), {known: database['questions'][known]})
+            self.assertIsNone(bank.quiz_ids('No such quiz'))
+
+    def test_empty_bank(self):
+        database = {'version': DATABASE_FORMAT_VERSION, 'questions': {}, 'quizzes': {}}
+        self.assert_round_trip(database)
+        with BinaryQuestionBank(self.write(database)) as bank:
+            self.assertNotIn('0123456789ab', bank)
+            self.assertEqual(bank.questions_of(['0123456789ab']), {})
+            with self.assertRaises(KeyError):
+                bank.question('0123456789ab')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import re
+import html
+import unicodedata
+from functools import lru_cache
+
+# Precompiled once; clean_text used to recompile seven patterns on every call
+WHITESPACE_PATTERN = re.compile(r'\s+')
+MARKUP_PATTERN = re.compile(r'<[^>]*>|/p>')  # Leftover HTML tags and broken </p> fragments
+OPTION_PREFIX_PATTERN = re.compile(r'^[a-z]\.\s*', re.IGNORECASE)  # "a. ", "B. " option labels
+ANSWER_PREFIX_PATTERN = re.compile(r'^[a-d]\.\s*')  # Labels on already lowercased text
+
+NON_WORD_PATTERN = re.compile(r'[\W_]+')
+
+NORMALIZE_CACHE_SIZE = 1 << 16
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_text(text: str) -> str:
+    """Clean and normalize text content
+
+    Strips leftover markup, decodes every HTML entity with html.unescape and
+    collapses whitespace (including the non-breaking spaces &nbsp; decodes to).
+    Results are memoized because the same option and answer strings are
+    normalized repeatedly during matching.
+    """
+    if not text:
+        return ""
+    text = MARKUP_PATTERN.sub('', text)
+    if '&' in text:
+        text = html.unescape(text)
+    return WHITESPACE_PATTERN.sub(' ', text).strip()
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_key(text: str) -> str:
+    """Return the normalized, lowercased form of text used for answer matching"""
+    return normalize_text(text).lower()
+
+def strip_option_prefix(text: str) -> str:
+    """Remove an option label such as 'a.' or 'B.' from the start of an option"""
+    return OPTION_PREFIX_PATTERN.sub('', text)
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def fold_text(text: str) -> str:
+    """Return a diacritic- and punctuation-insensitive form of text for similarity and search
+
+    Lowercases, removes combining marks (so 'điện toán' and 'dien toan' agree),
+    and turns every run of punctuation or whitespace into a single space.
+    """
+    text = normalize_key(text).replace('đ', 'd')
+    text = ''.join(ch for ch in unicodedata.normalize('NFD', text) if not unicodedata.combining(ch))
+    return NON_WORD_PATTERN.sub(' ', text).strip()